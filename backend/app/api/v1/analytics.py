@@ -0,0 +1,38 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.models.analytics import TimeReport, TimeReportGroup
+from app.crud import crud_analytics
+from app.core.deps import get_current_user
+
+router = APIRouter()
+
+MAX_REPORT_DAYS = 731
+
+
+@router.get("/time", response_model=TimeReport)
+async def get_time_report(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    group_by: TimeReportGroup = "day",
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Tracked time report (UTC days, both ends inclusive).
+
+    Defaults to the last 30 days. Served from daily rollups maintained as
+    timers are paused or tasks completed.
+    """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    if (end - start).days >= MAX_REPORT_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Reports span at most {MAX_REPORT_DAYS} days"
+        )
+    return await crud_analytics.get_time_report(str(current_user["_id"]), start, end, group_by)
@@ -3,29 +3,47 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from app.models.user import UserCreate, UserResponse, Token
 from app.crud import crud_user
-from app.core.security import create_access_token
+from app.core.security import create_access_token, PasswordHashingBusy
+from app.core.deps import get_current_user
 from app.core.config import settings
 
 router = APIRouter()
 
 
+# Seconds clients are asked to wait when password hashing is saturated
+HASHING_RETRY_AFTER = 1
+
+
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent logins, try again shortly",
+        headers={"Retry-After": str(HASHING_RETRY_AFTER)},
+    )
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(user: UserCreate):
     """Register a new user."""
     try:
-        db_user = crud_user.create_user(user)
+        db_user = await crud_user.create_user(user)
         return db_user
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except PasswordHashingBusy:
+        raise _hashing_busy()
 
 
 @router.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """Login and get access token."""
-    user = crud_user.authenticate_user(form_data.username, form_data.password)
+    try:
+        user = await crud_user.authenticate_user(form_data.username, form_data.password)
+    except PasswordHashingBusy:
+        raise _hashing_busy()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -42,9 +60,8 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: dict = Depends(lambda: None)):
+async def get_current_user_info(current_user: dict = Depends(get_current_user)):
     """Get current user information."""
-    from app.core.deps import get_current_user
-    user = await get_current_user()
+    user = dict(current_user)
     user["_id"] = str(user["_id"])
     return user
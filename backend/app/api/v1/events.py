@@ -0,0 +1,78 @@
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.deps import get_current_user_from_header_or_query
+from app.services.events import change_broker, TooManyStreams
+
+router = APIRouter()
+
+# Reconnect delay suggested to EventSource clients
+RETRY_MS = 3000
+
+
+async def _event_stream(user_id: str, last_event_id: Optional[str]) -> AsyncIterator[str]:
+    # Subscribing here, not in the endpoint, ties the subscription to the
+    # body: a response cancelled before it starts streaming holds none. If
+    # the last slot was taken since the endpoint checked, the stream ends
+    # and the client reconnects.
+    try:
+        subscription = change_broker.subscribe(user_id, last_event_id)
+    except TooManyStreams:
+        return
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            if subscription.needs_reset:
+                # Events were lost: drop what is queued and have the client
+                # catch up through /sync, resuming from the latest event.
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.needs_reset = False
+                yield f"id: {change_broker.latest_event_id()}\nevent: reset\ndata: {{}}\n\n"
+                continue
+            try:
+                event_id, payload = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if subscription.needs_reset:
+                continue
+            yield f"id: {event_id}\ndata: {json.dumps(payload)}\n\n"
+    finally:
+        change_broker.unsubscribe(user_id, subscription)
+
+
+@router.get("")
+async def stream_events(
+    last_event_id: Optional[str] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: dict = Depends(get_current_user_from_header_or_query)
+):
+    """
+    Server-Sent Events stream of the user's task and note changes.
+
+    Each message is ``{"kind", "op", "ids"}``. Reconnects resume after
+    ``Last-Event-ID`` (or ``?last_event_id=``); when that is no longer
+    possible, or the client fell behind, a ``reset`` event asks it to
+    resync through ``/sync``. A comment is sent as heartbeat every
+    ``EVENTS_HEARTBEAT_SECONDS``. Accepts ``?access_token=`` since
+    EventSource cannot send headers.
+    """
+    user_id = str(current_user["_id"])
+    try:
+        change_broker.check_capacity(user_id)
+    except TooManyStreams:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many open event streams"
+        )
+    return StreamingResponse(
+        _event_stream(user_id, last_event_id_header or last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
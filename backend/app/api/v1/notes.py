@@ -1,9 +1,22 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
-from app.models.note import NoteCreate, NoteUpdate, NoteResponse
-from app.crud import crud_note
+from typing import List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from app.models.note import (
+    NoteCreate, NoteUpdate, NoteResponse, NoteSearchResult, NoteSummary,
+    VideoUploadSession, VideoUploadSessionCreate, VideoUploadStatus
+)
+from app.models.imports import ImportResult
+from app.crud import crud_drive_jobs, crud_note, crud_sync, crud_upload_sessions
 from app.core.deps import get_current_user
-from app.services.google_drive import google_drive_service
+from app.core.etag import make_etag, matches, not_modified, set_etag
+from app.core.serialization import json_response
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from app.services.export import export_response
+from app.services.ndjson_import import import_ndjson
+from app.jobs.drive_uploads import drive_backend, job_available
+from app.services.video_storage import (
+    ChunkSizeMismatch, MalformedUpload, StoredFile, UploadTooLarge,
+    create_partial, finish_partial, partial_path, save_multipart_upload, write_chunk
+)
 from app.core.config import settings
 import os
 import uuid
@@ -15,40 +28,364 @@ router = APIRouter()
 @router.post("/", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
 async def create_note(note: NoteCreate, current_user: dict = Depends(get_current_user)):
     """Create a new note."""
-    db_note = crud_note.create_note(note, str(current_user["_id"]))
+    db_note = await crud_note.create_note(note, str(current_user["_id"]))
     return db_note
 
 
-@router.get("/", response_model=List[NoteResponse])
+@router.post("/import", response_model=ImportResult)
+async def import_notes(request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    Import notes from an NDJSON body (one ``NoteCreate`` JSON object per line).
+
+    The body is streamed: records are validated as they arrive and inserted
+    in batches, so memory does not grow with the file size. Invalid lines
+    are skipped and reported by line number.
+    """
+    user_id = str(current_user["_id"])
+    return await import_ndjson(
+        request.stream(),
+        NoteCreate,
+        lambda batch: crud_note.insert_notes(batch, user_id)
+    )
+
+
+@router.get("/", response_model=Union[List[NoteSummary], List[NoteResponse]])
 async def get_notes(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    view: Literal["full", "summary"] = "full",
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
-    """Get all notes for current user."""
-    notes = crud_note.get_notes(str(current_user["_id"]), skip, limit)
-    return notes
+    """
+    Get all notes for current user.
+
+    Pages are ordered by creation. Pass the ``X-Next-Cursor`` header of a
+    page as ``cursor`` to get the next one at constant cost; ``skip`` is the
+    legacy offset path. Responses carry an ETag; a matching
+    ``If-None-Match`` gets ``304`` without reading the notes.
 
+    ``view=summary`` returns a content preview instead of the full content.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    user_id = str(current_user["_id"])
+    version = await crud_sync.data_version(user_id)
+    etag = make_etag("notes", version, view, skip, limit, cursor)
+    if matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
+    notes = await crud_note.get_notes(
+        user_id, skip, limit, summary=view == "summary", after=after
+    )
+    if limit > 0 and len(notes) == limit:
+        last = notes[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last["created_at"], last["id"])
+    return json_response(List[NoteSummary] if view == "summary" else List[NoteResponse], notes, response)
 
-@router.get("/search", response_model=List[NoteResponse])
+
+@router.get("/search", response_model=List[NoteSearchResult])
 async def search_notes(
     q: str = Query(..., min_length=1),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user)
+):
+    """Search notes by title or content, best matches first."""
+    notes = await crud_note.search_notes(str(current_user["_id"]), q, skip, limit)
+    return json_response(List[NoteSearchResult], notes)
+
+
+@router.get("/export")
+async def export_notes(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    include_video: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Download every note as NDJSON or CSV, optionally gzip-compressed.
+
+    Notes are streamed from the database cursor as they are serialized.
+    Video notes and their Drive links are included with ``include_video``.
+    """
+    excluded = ("id", "user_id") if include_video else ("id", "user_id", "video_url", "video_size", "video_sha256")
+    columns = ["id"] + [field for field in NoteResponse.model_fields if field not in excluded]
+    return export_response(
+        crud_note.iter_notes(str(current_user["_id"]), include_video), "notes", format, columns, gzip
+    )
+
+
+def _video_filename(original: Optional[str]) -> str:
+    """Unique local (and Drive) name of an uploaded video."""
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    file_extension = os.path.splitext(original or "")[1] or '.webm'
+    return f"video_note_{timestamp}_{uuid.uuid4().hex[:8]}{file_extension}"
+
+
+async def _create_video_note(
+    title: str, folder: str, filename: str, mime_type: str, stored: StoredFile, user_id: str
+) -> dict:
+    """Create the note of a stored video and queue its Drive upload."""
+    note_data = NoteCreate(
+        title=title,
+        content=f"Video note recorded on {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}",
+        folder=folder,
+        tags=["video"],
+        note_type="video",
+        video_url=f"/uploads/{filename}",
+        video_size=stored.size,
+        video_sha256=stored.sha256
+    )
+    db_note = await crud_note.create_note(note_data, user_id)
+    
+    # Upload to Google Drive in the background
+    if drive_backend().available:
+        await crud_drive_jobs.enqueue_upload(db_note["id"], user_id, stored.path, filename, mime_type, stored.size)
+        job_available.set()
+    return db_note
+
+
+def _session_response(session: dict) -> VideoUploadSession:
+    return VideoUploadSession(
+        id=str(session["_id"]),
+        status=session["status"],
+        size=session["size"],
+        chunk_size=session["chunk_size"],
+        received_bytes=crud_upload_sessions.received_bytes(session),
+        offset=crud_upload_sessions.contiguous_bytes(session),
+        missing_chunks=crud_upload_sessions.missing_chunks(session),
+        note_id=session["note_id"],
+        expires_at=session["expires_at"]
+    )
+
+
+async def _get_session_or_404(session_id: str, user_id: str) -> dict:
+    session = await crud_upload_sessions.get_session(session_id, user_id)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    return session
+
+
+@router.post("/uploads", response_model=VideoUploadSession, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    upload: VideoUploadSessionCreate,
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Start a resumable video upload.
+    
+    The video is then sent in ``chunk_size`` pieces with
+    ``PUT /notes/uploads/{id}?offset=N``, in any order and in parallel;
+    every chunk but the last is exactly ``chunk_size`` bytes. After a lost
+    connection, ``HEAD`` (``Upload-Offset``) or ``GET`` (``missing_chunks``)
+    tells what to resend. ``POST /notes/uploads/{id}/complete`` creates the
+    note, as ``/upload-video`` does. Uploads expire
+    ``UPLOAD_SESSION_TTL_SECONDS`` after their last chunk.
+    """
+    if upload.size > settings.VIDEO_MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Video exceeds {settings.VIDEO_MAX_UPLOAD_BYTES} bytes"
+        )
+    try:
+        session = await crud_upload_sessions.create_session(
+            str(current_user["_id"]),
+            upload.title,
+            upload.folder,
+            _video_filename(upload.filename),
+            upload.mime_type,
+            upload.size
+        )
+    except crud_upload_sessions.TooManySessions:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"At most {settings.UPLOAD_SESSION_MAX_PER_USER} uploads can be open at once"
+        )
+    try:
+        await create_partial(settings.UPLOAD_DIR, session["filename"], session["size"])
+    except Exception as e:
+        await crud_upload_sessions.delete_session(session)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating upload: {str(e)}"
+        )
+    response.headers["Location"] = f"{settings.API_V1_PREFIX}/notes/uploads/{session['_id']}"
+    return _session_response(session)
+
+
+@router.get("/uploads/{session_id}", response_model=VideoUploadSession)
+async def get_upload(session_id: str, current_user: dict = Depends(get_current_user)):
+    """State of a resumable upload: received bytes and missing chunks."""
+    session = await _get_session_or_404(session_id, str(current_user["_id"]))
+    return _session_response(session)
+
+
+@router.head("/uploads/{session_id}")
+async def head_upload(session_id: str, current_user: dict = Depends(get_current_user)):
+    """Resume point for sequential clients, in ``Upload-Offset`` / ``Upload-Length``."""
+    session = await _get_session_or_404(session_id, str(current_user["_id"]))
+    return Response(headers={
+        "Upload-Offset": str(crud_upload_sessions.contiguous_bytes(session)),
+        "Upload-Length": str(session["size"]),
+        "Cache-Control": "no-store",
+    })
+
+
+@router.put("/uploads/{session_id}", response_model=VideoUploadSession)
+async def put_upload_chunk(
+    session_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
     current_user: dict = Depends(get_current_user)
 ):
-    """Search notes by title or content."""
-    notes = crud_note.search_notes(str(current_user["_id"]), q)
-    return notes
+    """
+    Write one chunk (the raw request body) at ``offset``.
+    
+    ``offset`` must be a multiple of ``chunk_size``. Resending a chunk
+    overwrites it, so retries are safe. A body of the wrong length gets
+    ``400`` and the chunk stays missing.
+    """
+    session = await _get_session_or_404(session_id, str(current_user["_id"]))
+    if session["status"] != "open":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload is {session['status']}"
+        )
+    chunk_size = session["chunk_size"]
+    if offset % chunk_size or offset >= session["size"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Offset must be a multiple of {chunk_size} below {session['size']}"
+        )
+    length = min(chunk_size, session["size"] - offset)
+    
+    # Completion waits for registered writers, so the chunk cannot land
+    # after the file was hashed
+    writer = await crud_upload_sessions.begin_write(session)
+    if writer is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is no longer open"
+        )
+    written = None
+    try:
+        await write_chunk(
+            partial_path(settings.UPLOAD_DIR, session["filename"]), offset, request.stream(), length
+        )
+        written = offset // chunk_size
+    except ChunkSizeMismatch:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Chunk at offset {offset} must be {length} bytes"
+        )
+    except FileNotFoundError:
+        # Expired and removed while the chunk was arriving
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    finally:
+        updated = await crud_upload_sessions.end_write(session, writer, written)
+    
+    if updated is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is no longer open"
+        )
+    return _session_response(updated)
+
+
+@router.post("/uploads/{session_id}/complete", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
+async def complete_upload(session_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Create the video note once every chunk is in.
+    
+    Answers ``409`` with the missing chunks otherwise. Completing again
+    returns the same note.
+    """
+    user_id = str(current_user["_id"])
+    session = await _get_session_or_404(session_id, user_id)
+    if session["status"] == "completed":
+        note = await crud_note.get_note(session["note_id"], user_id)
+        if not note:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Note not found"
+            )
+        return note
+    
+    missing = crud_upload_sessions.missing_chunks(session)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Upload is incomplete", "missing_chunks": missing}
+        )
+    session = await crud_upload_sessions.begin_completion(session)
+    if session is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is being completed or still receiving chunks"
+        )
+    
+    try:
+        stored = await finish_partial(settings.UPLOAD_DIR, session["filename"])
+        note = await _create_video_note(
+            session["title"], session["folder"], session["filename"], session["mime_type"], stored, user_id
+        )
+    except Exception as e:
+        await crud_upload_sessions.abort_completion(session)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error completing upload: {str(e)}"
+        )
+    await crud_upload_sessions.complete_session(session, note["id"])
+    return note
+
+
+@router.delete("/uploads/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_upload(session_id: str, current_user: dict = Depends(get_current_user)):
+    """Abandon a resumable upload and free its disk space."""
+    session = await _get_session_or_404(session_id, str(current_user["_id"]))
+    if session["status"] == "completing" and not crud_upload_sessions.is_stale_completion(session):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is being completed"
+        )
+    await crud_upload_sessions.delete_session(session)
 
 
 @router.get("/{note_id}", response_model=NoteResponse)
-async def get_note(note_id: str, current_user: dict = Depends(get_current_user)):
-    """Get a specific note."""
-    note = crud_note.get_note(note_id, str(current_user["_id"]))
+async def get_note(
+    note_id: str,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get a specific note. Answers ``304`` when ``If-None-Match`` matches."""
+    note = await crud_note.get_note(note_id, str(current_user["_id"]))
     if not note:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Note not found"
         )
+    etag = make_etag(note["id"], note["updated_at"])
+    if matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return note
 
 
@@ -59,7 +396,7 @@ async def update_note(
     current_user: dict = Depends(get_current_user)
 ):
     """Update a note."""
-    note = crud_note.update_note(note_id, note_update, str(current_user["_id"]))
+    note = await crud_note.update_note(note_id, note_update, str(current_user["_id"]))
     if not note:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -68,10 +405,33 @@ async def update_note(
     return note
 
 
+@router.get("/{note_id}/video-upload", response_model=VideoUploadStatus)
+async def get_video_upload(note_id: str, current_user: dict = Depends(get_current_user)):
+    """Progress of the Drive upload of a video note."""
+    job = await crud_drive_jobs.get_note_upload(note_id, str(current_user["_id"]))
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No upload for this note"
+        )
+    return VideoUploadStatus(
+        note_id=job["note_id"],
+        status=job["status"],
+        attempts=job["attempts"],
+        size=job["size"],
+        bytes_uploaded=job["bytes_uploaded"],
+        progress=job["bytes_uploaded"] / job["size"] if job["size"] else 1.0,
+        drive_url=job["drive_url"],
+        error=job["error"],
+        next_attempt_at=job["run_at"] if job["status"] == "queued" else None,
+        updated_at=job["updated_at"]
+    )
+
+
 @router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_note(note_id: str, current_user: dict = Depends(get_current_user)):
     """Delete a note."""
-    deleted = crud_note.delete_note(note_id, str(current_user["_id"]))
+    deleted = await crud_note.delete_note(note_id, str(current_user["_id"]))
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -79,54 +439,81 @@ async def delete_note(note_id: str, current_user: dict = Depends(get_current_use
         )
 
 
-@router.post("/upload-video", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/upload-video",
+    response_model=NoteResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"video": {"type": "string", "format": "binary"}},
+                        "required": ["video"],
+                    }
+                }
+            },
+        }
+    },
+)
 async def upload_video_note(
     title: str,
+    request: Request,
     folder: str = "General",
-    video: UploadFile = File(...),
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Upload a video note. The video will be uploaded to Google Drive 
-    in the Video/Notas folder and a note will be created with the reference.
+    Upload a video note (multipart field ``video``). The video will be
+    uploaded to Google Drive in the Video/Notas folder and a note will be
+    created with the reference.
+    
+    The body is parsed as it arrives and the video goes straight to disk
+    in chunks (hashed and size-checked on the way); Drive reads it from
+    there, so memory use does not depend on the video length. Videos over
+    ``VIDEO_MAX_UPLOAD_BYTES`` get ``413``, before the body is read when
+    ``Content-Length`` already says so.
+    
+    The note is returned as soon as the local copy is stored, with
+    ``video_url`` pointing to it; the Drive upload runs as a background job
+    and swaps the URL when done. Its progress is at
+    ``GET /notes/{note_id}/video-upload``.
     """
     try:
-        # Read video content
-        video_content = await video.read()
+        # Save locally (also the backup copy) without buffering the video
+        try:
+            upload = await save_multipart_upload(
+                request.headers.get("content-type"),
+                request.headers.get("content-length"),
+                request.stream(),
+                "video",
+                settings.UPLOAD_DIR,
+                _video_filename,
+                settings.VIDEO_MAX_UPLOAD_BYTES
+            )
+        except UploadTooLarge:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Video exceeds {settings.VIDEO_MAX_UPLOAD_BYTES} bytes"
+            )
+        except MalformedUpload as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
         
-        # Generate unique filename
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        file_extension = os.path.splitext(video.filename)[1] or '.webm'
-        unique_filename = f"video_note_{timestamp}_{uuid.uuid4().hex[:8]}{file_extension}"
-        
-        # Upload to Google Drive
-        drive_url = google_drive_service.upload_video(
-            file_content=video_content,
-            filename=unique_filename,
-            mime_type=video.content_type or 'video/webm'
-        )
-        
-        # Also save locally as backup (optional)
-        upload_dir = settings.UPLOAD_DIR
-        os.makedirs(upload_dir, exist_ok=True)
-        local_path = os.path.join(upload_dir, unique_filename)
-        
-        with open(local_path, 'wb') as f:
-            f.write(video_content)
-        
-        # Create note with video reference
-        note_data = NoteCreate(
-            title=title,
-            content=f"Video note recorded on {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}",
-            folder=folder,
-            tags=["video"],
-            note_type="video",
-            video_url=drive_url or f"/uploads/{unique_filename}"
+        return await _create_video_note(
+            title,
+            folder,
+            os.path.basename(upload.stored.path),
+            upload.content_type or 'video/webm',
+            upload.stored,
+            str(current_user["_id"])
         )
         
-        db_note = crud_note.create_note(note_data, str(current_user["_id"]))
-        return db_note
-        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
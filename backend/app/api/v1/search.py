@@ -0,0 +1,24 @@
+from typing import List, Optional, Literal
+from fastapi import APIRouter, Depends, Query
+from app.models.search import AutocompleteItem
+from app.core.deps import get_current_user
+from app.services.typeahead import typeahead_index
+
+router = APIRouter()
+
+
+@router.get("/autocomplete", response_model=List[AutocompleteItem])
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    kind: Optional[Literal["note", "task"]] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Typeahead over note and task titles.
+
+    Every word of ``q`` must prefix a word of the title, so "proy reu"
+    matches "Reunión de proyecto". Served from an in-memory index.
+    """
+    kinds = [kind] if kind else None
+    return await typeahead_index.search(str(current_user["_id"]), q, limit, kinds)
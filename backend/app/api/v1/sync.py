@@ -0,0 +1,36 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.models.sync import SyncResponse
+from app.crud import crud_sync
+from app.core.deps import get_current_user
+from app.core.serialization import json_response
+
+router = APIRouter()
+
+
+@router.get("", response_model=SyncResponse)
+async def sync(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=2000),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Tasks and notes changed or deleted since ``since``.
+
+    Call without ``since`` for a full initial sync, then keep the
+    ``next_token`` of each response for the next call. ``410`` means the
+    token is too old to know every deletion: sync again from scratch.
+    """
+    try:
+        changes = await crud_sync.get_changes(str(current_user["_id"]), since, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except crud_sync.SyncTokenExpired:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync token expired, sync again without 'since'"
+        )
+    return json_response(SyncResponse, changes)
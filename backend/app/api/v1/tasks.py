@@ -1,8 +1,17 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from app.models.task import TaskCreate, TaskUpdate, TaskResponse
-from app.crud import crud_task
+from typing import List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from app.models.task import (
+    TaskCreate, TaskUpdate, TaskResponse, TaskStats, TaskSummary, TimeEntry,
+    TaskBulkRequest, TaskBulkResponse
+)
+from app.models.imports import ImportResult
+from app.crud import crud_task, crud_stats, crud_sync
 from app.core.deps import get_current_user
+from app.core.etag import make_etag, matches, not_modified, set_etag
+from app.core.serialization import json_response
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from app.services.export import export_response
+from app.services.ndjson_import import import_ndjson
 from datetime import datetime
 
 router = APIRouter()
@@ -11,33 +20,148 @@ router = APIRouter()
 @router.post("/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_task(task: TaskCreate, current_user: dict = Depends(get_current_user)):
     """Create a new task."""
-    db_task = crud_task.create_task(task, str(current_user["_id"]))
+    db_task = await crud_task.create_task(task, str(current_user["_id"]))
     return db_task
 
 
-@router.get("/", response_model=List[TaskResponse])
+@router.post("/bulk", response_model=TaskBulkResponse)
+async def bulk_tasks(request: TaskBulkRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Create, update, change the status of and delete many tasks at once.
+
+    All writes go to MongoDB as one bulk_write (``ordered`` stops at the
+    first failure). Each operation gets its own result; tasks listed in
+    ``fetch_ids`` are returned as they are after the writes.
+    """
+    return await crud_task.bulk_tasks(
+        str(current_user["_id"]), request.operations, request.ordered, request.fetch_ids
+    )
+
+
+@router.post("/import", response_model=ImportResult)
+async def import_tasks(request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    Import tasks from an NDJSON body (one ``TaskCreate`` JSON object per line).
+
+    The body is streamed: records are validated as they arrive and inserted
+    in batches, so memory does not grow with the file size. Invalid lines
+    are skipped and reported by line number.
+    """
+    user_id = str(current_user["_id"])
+    return await import_ndjson(
+        request.stream(),
+        TaskCreate,
+        lambda batch: crud_task.insert_tasks(batch, user_id)
+    )
+
+
+@router.get("/", response_model=Union[List[TaskSummary], List[TaskResponse]])
 async def get_tasks(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    view: Literal["full", "summary"] = "full",
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
-    """Get all tasks for current user."""
-    tasks = crud_task.get_tasks(str(current_user["_id"]), skip, limit)
-    return tasks
+    """
+    Get all tasks for current user.
+
+    Pages are ordered by creation. Pass the ``X-Next-Cursor`` header of a
+    page as ``cursor`` to get the next one at constant cost; ``skip`` is the
+    legacy offset path. Responses carry an ETag; a matching
+    ``If-None-Match`` gets ``304`` without reading the tasks.
+
+    ``view=summary`` returns only the fields the board renders, plus subtask
+    counters, instead of full documents.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    user_id = str(current_user["_id"])
+    version = await crud_sync.data_version(user_id)
+    etag = make_etag("tasks", version, view, skip, limit, cursor)
+    if matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
+    tasks = await crud_task.get_tasks(
+        user_id, skip, limit, summary=view == "summary", after=after
+    )
+    if limit > 0 and len(tasks) == limit:
+        last = tasks[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last["created_at"], last["id"])
+    return json_response(List[TaskSummary] if view == "summary" else List[TaskResponse], tasks, response)
+
+
+@router.get("/stats", response_model=TaskStats)
+async def get_task_stats(current_user: dict = Depends(get_current_user)):
+    """Get task counters for the dashboard (per status, priority and quadrant)."""
+    return await crud_stats.get_task_stats(str(current_user["_id"]))
+
+
+@router.get("/export")
+async def export_tasks(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Download every task as NDJSON or CSV, optionally gzip-compressed.
+
+    Tasks are streamed from the database cursor as they are serialized.
+    In CSV, lists and nested objects are JSON-encoded.
+    """
+    columns = ["id"] + [field for field in TaskResponse.model_fields if field not in ("id", "user_id")]
+    return export_response(
+        crud_task.iter_tasks(str(current_user["_id"])), "tasks", format, columns, gzip
+    )
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
-async def get_task(task_id: str, current_user: dict = Depends(get_current_user)):
-    """Get a specific task."""
-    task = crud_task.get_task(task_id, str(current_user["_id"]))
+async def get_task(
+    task_id: str,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get a specific task. Answers ``304`` when ``If-None-Match`` matches."""
+    task = await crud_task.get_task(task_id, str(current_user["_id"]))
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
+    etag = make_etag(task["id"], task["updated_at"])
+    if matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return task
 
 
+@router.get("/{task_id}/time-entries", response_model=List[TimeEntry])
+async def get_task_time_entries(
+    task_id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get the time entries of a task, newest first."""
+    entries = await crud_task.get_time_entries(task_id, str(current_user["_id"]), skip, limit)
+    if entries is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    return entries
+
+
 @router.put("/{task_id}", response_model=TaskResponse)
 async def update_task(
     task_id: str,
@@ -45,7 +169,7 @@ async def update_task(
     current_user: dict = Depends(get_current_user)
 ):
     """Update a task."""
-    task = crud_task.update_task(task_id, task_update, str(current_user["_id"]))
+    task = await crud_task.update_task(task_id, task_update, str(current_user["_id"]))
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -57,7 +181,7 @@ async def update_task(
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(task_id: str, current_user: dict = Depends(get_current_user)):
     """Delete a task."""
-    deleted = crud_task.delete_task(task_id, str(current_user["_id"]))
+    deleted = await crud_task.delete_task(task_id, str(current_user["_id"]))
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -68,7 +192,7 @@ async def delete_task(task_id: str, current_user: dict = Depends(get_current_use
 @router.post("/{task_id}/start", response_model=TaskResponse)
 async def start_task_timer(task_id: str, current_user: dict = Depends(get_current_user)):
     """Start the timer for a task."""
-    task = crud_task.start_timer(task_id, str(current_user["_id"]))
+    task = await crud_task.start_timer(task_id, str(current_user["_id"]))
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -80,7 +204,7 @@ async def start_task_timer(task_id: str, current_user: dict = Depends(get_curren
 @router.post("/{task_id}/pause", response_model=TaskResponse)
 async def pause_task_timer(task_id: str, current_user: dict = Depends(get_current_user)):
     """Pause the timer for a task."""
-    task = crud_task.pause_timer(task_id, str(current_user["_id"]))
+    task = await crud_task.pause_timer(task_id, str(current_user["_id"]))
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -92,7 +216,7 @@ async def pause_task_timer(task_id: str, current_user: dict = Depends(get_curren
 @router.post("/{task_id}/complete", response_model=TaskResponse)
 async def complete_task(task_id: str, current_user: dict = Depends(get_current_user)):
     """Complete a task and stop the timer."""
-    task = crud_task.complete_task(task_id, str(current_user["_id"]))
+    task = await crud_task.complete_task(task_id, str(current_user["_id"]))
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,301 @@
+"""
+Admission control.
+
+Every API request passes two checks before it reaches a route:
+
+* a token bucket per user (JWT ``sub``, or client address when anonymous;
+  behind ``ADMISSION_TRUSTED_PROXIES`` the address comes from
+  ``X-Forwarded-For``), answering ``429`` with ``Retry-After`` once the bucket is empty;
+* a global limit on requests in flight, adapted to observed latency
+  (additive increase while latency stays under target, multiplicative
+  decrease above it), answering ``503`` with ``Retry-After``.
+
+Rejections are immediate: nothing waits in a queue. Buckets live in process
+memory by default; ``ADMISSION_STORE=mongo`` shares them between workers
+through the ``rate_limits`` collection.
+"""
+import ipaddress
+import json
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from pymongo import ReturnDocument
+from app.core import auth_cache
+from app.core.config import settings
+from app.core.security import decode_token
+from app.db.mongodb_utils import get_database
+
+# Not rate limited: probes, docs and static files
+EXEMPT_PREFIXES = ("/health", "/ready", "/metrics", "/docs", "/redoc", "/openapi.json", "/uploads")
+
+# Long-lived streams and transfers are rate limited but neither count as in
+# flight nor feed the latency average (their duration depends on the client)
+STREAMING_PREFIXES = (
+    f"{settings.API_V1_PREFIX}/events",
+    f"{settings.API_V1_PREFIX}/notes/uploads",
+    f"{settings.API_V1_PREFIX}/notes/upload-video",
+)
+STREAMING_SUFFIXES = ("/export", "/import")
+
+# Smallest interval between two decreases of the in-flight limit
+DECREASE_INTERVAL_SECONDS = 1.0
+LATENCY_SMOOTHING = 0.1
+
+TRUSTED_PROXIES = [ipaddress.ip_network(proxy, strict=False) for proxy in settings.ADMISSION_TRUSTED_PROXIES]
+
+
+class InMemoryBucketStore:
+    """Token buckets of this process, least recently used evicted first."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token. Returns 0 if admitted, else seconds until a token is available."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class MongoBucketStore:
+    """
+    Token buckets shared by all workers: one atomic pipeline update per
+    request on ``rate_limits``. Idle buckets expire through a TTL index.
+    """
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        db = get_database()
+        now = datetime.utcnow()
+        elapsed_seconds = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        refilled = {
+            "$min": [burst, {"$add": [{"$ifNull": ["$tokens", burst]}, {"$multiply": [elapsed_seconds, rate]}]}]
+        }
+        bucket = await db.rate_limits.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled}},
+                {
+                    "$set": {
+                        "admitted": {"$gte": ["$tokens", 1]},
+                        "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                        "updated_at": now,
+                        # A full bucket carries no information
+                        "expires_at": now + timedelta(seconds=burst / rate),
+                    }
+                },
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if bucket["admitted"]:
+            return 0.0
+        return (1 - bucket["tokens"]) / rate
+
+
+class AdaptiveLimiter:
+    """Global in-flight limit steered by a moving average of latency."""
+
+    def __init__(self, initial: int, minimum: int, maximum: int, target_latency_ms: int):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target = target_latency_ms / 1000
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self._limit_reached = False
+        self._last_decrease = 0.0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= self.limit:
+            self._limit_reached = True
+            return False
+        self.in_flight += 1
+        if self.in_flight >= self.limit:
+            self._limit_reached = True
+        return True
+
+    def release(self, latency: float) -> None:
+        self.in_flight -= 1
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+
+        now = time.monotonic()
+        if self.latency > self.target:
+            if now - self._last_decrease >= DECREASE_INTERVAL_SECONDS:
+                self.limit = max(self.minimum, int(self.limit * 0.9))
+                self._last_decrease = now
+        elif self._limit_reached:
+            # Only grow when the limit is what holds requests back
+            self.limit = min(self.maximum, self.limit + 1)
+            self._limit_reached = False
+
+
+class AdmissionStats:
+    def __init__(self):
+        self.admitted = 0
+        self.rejected_rate = 0
+        self.rejected_overload = 0
+
+
+limiter = AdaptiveLimiter(
+    initial=settings.ADMISSION_INITIAL_LIMIT,
+    minimum=settings.ADMISSION_MIN_LIMIT,
+    maximum=settings.ADMISSION_MAX_LIMIT,
+    target_latency_ms=settings.ADMISSION_TARGET_LATENCY_MS,
+)
+bucket_store = (
+    MongoBucketStore() if settings.ADMISSION_STORE == "mongo"
+    else InMemoryBucketStore(settings.ADMISSION_MAX_TRACKED_USERS)
+)
+admission_stats = AdmissionStats()
+
+
+def stats() -> dict:
+    return {
+        "enabled": settings.ADMISSION_ENABLED,
+        "store": settings.ADMISSION_STORE,
+        "limit": limiter.limit,
+        "in_flight": limiter.in_flight,
+        "latency_ms": round(limiter.latency * 1000, 2) if limiter.latency is not None else None,
+        "admitted": admission_stats.admitted,
+        "rejected_rate": admission_stats.rejected_rate,
+        "rejected_overload": admission_stats.rejected_overload,
+    }
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+def _client_address(scope) -> str:
+    """
+    Address of the client. Behind trusted proxies it is the rightmost
+    ``X-Forwarded-For`` entry not added by one of them (entries further
+    left are client-supplied and could be forged).
+    """
+    client = scope.get("client")
+    address = client[0] if client else "unknown"
+    if not TRUSTED_PROXIES or not _is_trusted_proxy(address):
+        return address
+    forwarded = [
+        value.decode("latin-1") for name, value in scope["headers"] if name == b"x-forwarded-for"
+    ]
+    hops = [hop.strip() for hop in ",".join(forwarded).split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+        address = hop
+    return address
+
+
+def _client_key(scope) -> str:
+    """``user:<sub>`` for a valid bearer token, else ``ip:<address>``."""
+    token = None
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, credentials = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer":
+                token = credentials.strip()
+            break
+    if token is None and b"access_token=" in scope.get("query_string", b""):
+        # EventSource streams authenticate through the query string
+        for pair in scope["query_string"].decode("latin-1").split("&"):
+            name, _, value = pair.partition("=")
+            if name == "access_token":
+                token = value
+
+    if token:
+        claims = auth_cache.get_claims(token)
+        if claims is None:
+            claims = decode_token(token)
+            if claims is not None:
+                auth_cache.cache_claims(token, claims)
+        if claims and claims.get("sub"):
+            return f"user:{claims['sub']}"
+    return f"ip:{_client_address(scope)}"
+
+
+def _is_streaming(path: str) -> bool:
+    return path.startswith(STREAMING_PREFIXES) or path.endswith(STREAMING_SUFFIXES)
+
+
+async def _reject(send, status_code: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying the per-user buckets and the global limit."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or not settings.ADMISSION_ENABLED
+            or scope.get("method") == "OPTIONS"
+            or path == "/"
+            or path.startswith(EXEMPT_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            wait = await bucket_store.take(
+                _client_key(scope), settings.ADMISSION_USER_RATE, settings.ADMISSION_USER_BURST
+            )
+        except Exception as e:
+            # Shared store unavailable: fail open rather than refuse everything
+            print(f"Warning: Rate limit store error: {e}")
+            wait = 0.0
+        if wait > 0:
+            admission_stats.rejected_rate += 1
+            await _reject(send, 429, "Too many requests", wait)
+            return
+
+        if _is_streaming(path):
+            admission_stats.admitted += 1
+            await self.app(scope, receive, send)
+            return
+
+        if not limiter.try_acquire():
+            admission_stats.rejected_overload += 1
+            await _reject(send, 503, "Server busy, try again shortly", 1)
+            return
+
+        admission_stats.admitted += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - start)
@@ -0,0 +1,100 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from app.core.config import settings
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries also expire.
+
+    Single-threaded (event loop) use only. Keeps hit/miss counters for the
+    ``/metrics`` endpoint.
+    """
+
+    def __init__(self, name: str, max_size: int):
+        self.name = name
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float) -> None:
+        if ttl_seconds <= 0 or self.max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+# Verified JWT claims, keyed by token digest, kept until the token expires
+token_cache = TTLCache("tokens", settings.AUTH_TOKEN_CACHE_SIZE)
+
+# User documents, keyed by user id. Other workers see changes after at most
+# AUTH_USER_CACHE_TTL_SECONDS; this worker as soon as invalidate_user runs.
+user_cache = TTLCache("users", settings.AUTH_USER_CACHE_SIZE)
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_claims(token: str) -> Optional[dict]:
+    return token_cache.get(token_key(token))
+
+
+def cache_claims(token: str, claims: dict) -> None:
+    expires = claims.get("exp")
+    if isinstance(expires, (int, float)):
+        token_cache.set(token_key(token), claims, expires - time.time())
+
+
+def get_user(user_id: str) -> Optional[dict]:
+    user = user_cache.get(user_id)
+    # Callers may modify what they get
+    return dict(user) if user is not None else None
+
+
+def cache_user(user_id: str, user: dict) -> None:
+    user_cache.set(user_id, dict(user), settings.AUTH_USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: str) -> None:
+    """Call after any write to a user document."""
+    user_cache.invalidate(user_id)
+
+
+def stats() -> dict:
+    return {cache.name: cache.stats() for cache in (token_cache, user_cache)}
@@ -6,6 +6,61 @@ class Settings(BaseSettings):
     # MongoDB
     MONGODB_URL: str = "mongodb://localhost:27017"
     DATABASE_NAME: str = "cop_db"
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 10
+    MONGODB_MAX_IDLE_TIME_MS: int = 300000
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 5000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_CONNECT_TIMEOUT_MS: int = 5000
+    MONGODB_SOCKET_TIMEOUT_MS: int = 30000
+    MONGODB_COMPRESSORS: str = ""  # e.g. "zstd,snappy,zlib"
+    READINESS_PING_TIMEOUT_MS: int = 1000
+    
+    # Note search (language of the text index: stemming and stop words)
+    NOTES_SEARCH_LANGUAGE: str = "spanish"
+    
+    # Typeahead (in-memory title prefix indexes)
+    TYPEAHEAD_MAX_USERS: int = 1000
+    TYPEAHEAD_INDEX_TTL_SECONDS: int = 300
+    
+    # NDJSON import
+    IMPORT_BATCH_SIZE: int = 500
+    IMPORT_MAX_LINE_BYTES: int = 1048576
+    IMPORT_MAX_ERRORS: int = 100
+    
+    # Delta sync
+    SYNC_TOMBSTONE_TTL_DAYS: int = 30
+    SYNC_PENDING_TIMEOUT_SECONDS: int = 60  # writes in flight longer are not waited for
+    
+    # Change events (SSE)
+    EVENTS_SOURCE: str = "local"  # "local" or "change_stream" (replica set, multi-worker)
+    EVENTS_HEARTBEAT_SECONDS: int = 15
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_REPLAY_SIZE: int = 200
+    EVENTS_MAX_STREAMS_PER_USER: int = 10
+    EVENTS_MAX_USERS: int = 1000
+    
+    # Auth caches (verified token claims and user documents)
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60
+    
+    # Password hashing (bcrypt)
+    BCRYPT_ROUNDS: int = 12  # stored hashes with other costs are upgraded on login
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    
+    # Admission control (per-user token buckets, adaptive in-flight limit)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_STORE: str = "memory"  # "memory" or "mongo" (shared by workers)
+    ADMISSION_USER_RATE: float = 20.0  # requests per second
+    ADMISSION_USER_BURST: int = 40
+    ADMISSION_MAX_TRACKED_USERS: int = 10000
+    ADMISSION_INITIAL_LIMIT: int = 100
+    ADMISSION_MIN_LIMIT: int = 10
+    ADMISSION_MAX_LIMIT: int = 500
+    ADMISSION_TARGET_LATENCY_MS: int = 250
+    ADMISSION_TRUSTED_PROXIES: List[str] = []  # addresses or CIDRs whose X-Forwarded-For is believed
     
     # JWT
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
@@ -22,6 +77,30 @@ class Settings(BaseSettings):
     # Google Drive
     GOOGLE_DRIVE_CREDENTIALS_FILE: str = ""
     UPLOAD_DIR: str = "uploads"
+    UPLOAD_CHUNK_BYTES: int = 1048576
+    VIDEO_MAX_UPLOAD_BYTES: int = 2147483648
+    
+    # Resumable video uploads
+    UPLOAD_SESSION_CHUNK_BYTES: int = 8388608
+    UPLOAD_SESSION_TTL_SECONDS: int = 86400  # since the last chunk
+    UPLOAD_SESSION_MAX_PER_USER: int = 5
+    UPLOAD_SESSION_SWEEP_SECONDS: int = 600
+    UPLOAD_SESSION_COMPLETION_TIMEOUT_SECONDS: int = 600  # completions stuck longer can be retried
+    
+    # Drive upload jobs
+    DRIVE_BACKEND: str = "google"  # "google" or "fake" (local directory, for tests)
+    FAKE_DRIVE_DIR: str = "fake_drive"
+    DRIVE_JOBS_IN_PROCESS: bool = True  # run workers inside the API process
+    DRIVE_JOBS_CONCURRENCY: int = 2
+    DRIVE_JOBS_MAX_ATTEMPTS: int = 5
+    DRIVE_JOBS_BACKOFF_SECONDS: int = 30
+    DRIVE_JOBS_LEASE_SECONDS: int = 300
+    DRIVE_JOBS_POLL_SECONDS: int = 5
+    
+    # Drive folders: placeholders {user_id}, {folder}, {year}, {month}
+    DRIVE_FOLDER_LAYOUT: str = "Video/Notas"
+    DRIVE_FOLDER_CACHE_SIZE: int = 10000
+    DRIVE_FOLDER_CACHE_TTL_SECONDS: int = 86400
     
     class Config:
         env_file = ".env"
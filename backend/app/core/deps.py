@@ -1,33 +1,59 @@
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from app.core import auth_cache
 from app.core.security import decode_token
 from app.db.mongodb_utils import get_database
 from bson import ObjectId
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"/api/v1/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"/api/v1/auth/login", auto_error=False)
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """Get current authenticated user from token."""
+    return await _user_from_token(token)
+
+
+async def get_current_user_from_header_or_query(
+    access_token: Optional[str] = None,
+    token: Optional[str] = Depends(optional_oauth2_scheme)
+):
+    """
+    Like ``get_current_user``, also accepting the token as ``?access_token=``
+    for clients that cannot set headers (EventSource).
+    """
+    return await _user_from_token(token or access_token)
+
+
+async def _user_from_token(token: Optional[str]):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    payload = decode_token(token)
-    if payload is None:
+    if not token:
         raise credentials_exception
     
+    # Steady state: both lookups are served from memory
+    payload = auth_cache.get_claims(token)
+    if payload is None:
+        payload = decode_token(token)
+        if payload is None:
+            raise credentials_exception
+        auth_cache.cache_claims(token, payload)
+    
     user_id: str = payload.get("sub")
     if user_id is None:
         raise credentials_exception
     
-    db = get_database()
-    user = db.users.find_one({"_id": ObjectId(user_id)})
-    
+    user = auth_cache.get_user(user_id)
     if user is None:
-        raise credentials_exception
+        db = get_database()
+        user = await db.users.find_one({"_id": ObjectId(user_id)})
+        if user is None:
+            raise credentials_exception
+        auth_cache.cache_user(user_id, user)
     
     return user
@@ -0,0 +1,35 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response, status
+
+ETAG_HEADER = "ETag"
+
+# Clients may reuse a response only after revalidating it with If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """Strong entity tag from the values a response depends on."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header covers ``etag``."""
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    # If-None-Match uses weak comparison
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers[ETAG_HEADER] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_etag(response, etag)
+    return response
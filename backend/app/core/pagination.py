@@ -0,0 +1,35 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, item_id: str) -> str:
+    """Encode the sort key of the last item of a page as an opaque cursor."""
+    raw = f"{created_at.isoformat()}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Decode a cursor produced by ``encode_cursor``. Raises ValueError if invalid."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, item_id = raw.split("|")
+        return datetime.fromisoformat(created_at), ObjectId(item_id)
+    except (ValueError, InvalidId, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_filter(after: Tuple[datetime, ObjectId], field: str = "created_at") -> dict:
+    """Filter matching items sorted strictly after ``after`` on (``field``, _id)."""
+    value, item_id = after
+    return {
+        "$or": [
+            {field: {"$gt": value}},
+            {field: value, "_id": {"$gt": item_id}},
+        ]
+    }
@@ -1,10 +1,33 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the
+# event loop. Work beyond PASSWORD_HASH_MAX_PENDING is rejected instead of
+# queued, so a login burst cannot build an unbounded backlog.
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_pending_hashes = 0
+
+
+class PasswordHashingBusy(Exception):
+    """Too many password hashes are queued; retry later."""
+
+
+async def _run_hashing(function, *args):
+    global _pending_hashes
+    if _pending_hashes >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHashingBusy()
+    _pending_hashes += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, function, *args)
+    finally:
+        _pending_hashes -= 1
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -17,6 +40,30 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def hash_password(password: str) -> str:
+    """``get_password_hash`` on the hashing pool. Raises PasswordHashingBusy."""
+    return await _run_hashing(pwd_context.hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the hashing pool. Raises PasswordHashingBusy.
+
+    Returns ``(valid, new_hash)``; ``new_hash`` is set when the stored hash
+    uses outdated parameters (e.g. fewer rounds than ``BCRYPT_ROUNDS``) and
+    should replace it.
+    """
+    return await _run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+def hashing_stats() -> dict:
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "pending": _pending_hashes,
+        "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+    }
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token."""
     to_encode = data.copy()
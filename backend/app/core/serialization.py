@@ -0,0 +1,41 @@
+from functools import lru_cache
+from typing import Any, Optional
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    """TypeAdapter for ``tp``, built once per type (building one is costly)."""
+    return TypeAdapter(tp)
+
+
+def dump_json(tp: Any, data: Any) -> bytes:
+    """Validate ``data`` once against ``tp`` and encode it to JSON in pydantic-core."""
+    adapter = type_adapter(tp)
+    return adapter.dump_json(adapter.validate_python(data))
+
+
+def json_response(
+    tp: Any,
+    data: Any,
+    response: Optional[Response] = None,
+    status_code: int = status.HTTP_200_OK
+) -> Response:
+    """
+    Fast path for large responses.
+
+    Mongo documents are validated a single time and serialized without the
+    ``response_model`` round trip (validation, ``jsonable_encoder`` and
+    ``json.dumps``). Headers set on the injected ``response`` are kept,
+    since FastAPI does not merge them into returned responses.
+    """
+    headers = None
+    if response is not None:
+        headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return Response(
+        content=dump_json(tp, data),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
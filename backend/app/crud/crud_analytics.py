@@ -0,0 +1,131 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Tuple
+from pymongo import UpdateOne
+from app.crud.crud_stats import NO_QUADRANT, field_value
+from app.db.mongodb_utils import get_database
+
+# Daily rollups of tracked time, one document per user and UTC day:
+#   {user_id, day, seconds, sessions, by_priority: {...}, by_quadrant: {...}, by_tag: {...}}
+DIMENSIONS = {"priority": "by_priority", "quadrant": "by_quadrant", "tag": "by_tag"}
+
+
+def encode_key(key: str) -> str:
+    """Make a tag usable as a field name (no dots, no leading dollar)."""
+    key = key.replace(".", "．")
+    return "＄" + key[1:] if key.startswith("$") else key
+
+
+def decode_key(key: str) -> str:
+    key = key.replace("．", ".")
+    return "$" + key[1:] if key.startswith("＄") else key
+
+
+def split_by_day(start: datetime, end: datetime, duration_seconds: int) -> List[Tuple[datetime, int]]:
+    """
+    Split a session at UTC midnights.
+
+    Returns (day, seconds) pairs whose seconds add up to ``duration_seconds``.
+    """
+    pieces = []
+    cursor = start
+    while True:
+        next_midnight = datetime.combine(cursor.date() + timedelta(days=1), time())
+        if end <= next_midnight:
+            pieces.append((datetime.combine(cursor.date(), time()), end))
+            break
+        pieces.append((datetime.combine(cursor.date(), time()), next_midnight))
+        cursor = next_midnight
+
+    if len(pieces) == 1:
+        return [(pieces[0][0], duration_seconds)]
+
+    split, assigned = [], 0
+    piece_start = start
+    for day, piece_end in pieces[:-1]:
+        seconds = int((piece_end - piece_start).total_seconds())
+        split.append((day, seconds))
+        assigned += seconds
+        piece_start = piece_end
+    split.append((pieces[-1][0], max(duration_seconds - assigned, 0)))
+    return split
+
+
+def session_increments(task: dict, entry: dict) -> Dict[datetime, Dict[str, int]]:
+    """``$inc`` documents, per day, for one closed session of ``task``."""
+    increments = {}
+    split = split_by_day(entry["start_time"], entry["end_time"], entry.get("duration_seconds") or 0)
+    for index, (day, seconds) in enumerate(split):
+        inc = {"seconds": seconds, "sessions": 1 if index == 0 else 0}
+        inc[f"by_priority.{field_value(task.get('priority')) or 'medium'}"] = seconds
+        inc[f"by_quadrant.{field_value(task.get('eisenhower_quadrant')) or NO_QUADRANT}"] = seconds
+        for tag in set(task.get("tags") or []):
+            if not tag:
+                # "by_tag." is not a valid field path and would fail the whole write
+                continue
+            inc[f"by_tag.{encode_key(tag)}"] = seconds
+        increments[day] = inc
+    return increments
+
+
+async def record_session(task: dict, entry: dict) -> None:
+    """Add a closed session to the daily rollups of the task's owner."""
+    db = get_database()
+    operations = [
+        UpdateOne({"user_id": task["user_id"], "day": day}, {"$inc": inc}, upsert=True)
+        for day, inc in session_increments(task, entry).items()
+    ]
+    if operations:
+        await db.time_stats_daily.bulk_write(operations, ordered=False)
+
+
+def _week_key(day: datetime) -> str:
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+async def get_time_report(user_id: str, start: date, end: date, group_by: str) -> dict:
+    """
+    Tracked time between ``start`` and ``end`` (inclusive, UTC days).
+
+    ``group_by`` is one of day, week, priority, quadrant or tag. Only the
+    daily rollups are read: at most one small document per day.
+    """
+    db = get_database()
+    cursor = db.time_stats_daily.find(
+        {
+            "user_id": user_id,
+            "day": {
+                "$gte": datetime.combine(start, time()),
+                "$lte": datetime.combine(end, time())
+            }
+        },
+        {"_id": 0, "user_id": 0}
+    ).sort("day", 1)
+
+    seconds = defaultdict(int)
+    sessions = defaultdict(int)
+    total = 0
+    async for doc in cursor:
+        total += doc.get("seconds", 0)
+        if group_by in ("day", "week"):
+            key = doc["day"].strftime("%Y-%m-%d") if group_by == "day" else _week_key(doc["day"])
+            seconds[key] += doc.get("seconds", 0)
+            sessions[key] += doc.get("sessions", 0)
+        else:
+            for key, value in (doc.get(DIMENSIONS[group_by]) or {}).items():
+                seconds[decode_key(key)] += value
+
+    buckets = [
+        {"key": key, "seconds": value, "sessions": sessions.get(key)}
+        for key, value in seconds.items()
+    ]
+    if group_by not in ("day", "week"):
+        buckets.sort(key=lambda bucket: bucket["seconds"], reverse=True)
+    return {
+        "group_by": group_by,
+        "start": start,
+        "end": end,
+        "total_seconds": total,
+        "buckets": buckets,
+    }
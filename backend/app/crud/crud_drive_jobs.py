@@ -0,0 +1,171 @@
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.db.mongodb_utils import get_database
+
+# Queue of Drive uploads, one job per video note, in drive_upload_jobs:
+#   {note_id, user_id, path, filename, mime_type, size, status, attempts,
+#    run_at, worker, claim, locked_until, bytes_uploaded, drive_url, error,
+#    created_at, updated_at}
+# status: queued -> running -> done | failed | cancelled (queued again
+# between retries).
+# A running job whose lease (locked_until) expired belongs to a crashed
+# worker and is claimed again, unless it already had DRIVE_JOBS_MAX_ATTEMPTS
+# attempts: then it failed. Every claim gets a new ``claim`` token, and
+# a worker only moves the job on while it still holds its claim, so a
+# worker that lost its lease cannot overwrite its successor's outcome.
+
+MAX_BACKOFF_SECONDS = 3600
+
+
+async def enqueue_upload(note_id: str, user_id: str, path: str, filename: str, mime_type: str, size: int) -> dict:
+    db = get_database()
+    now = datetime.utcnow()
+    job = {
+        "note_id": note_id,
+        "user_id": user_id,
+        "path": path,
+        "filename": filename,
+        "mime_type": mime_type,
+        "size": size,
+        "status": "queued",
+        "attempts": 0,
+        "run_at": now,
+        "worker": None,
+        "claim": None,
+        "locked_until": None,
+        "bytes_uploaded": 0,
+        "drive_url": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    try:
+        result = await db.drive_upload_jobs.insert_one(job)
+        job["_id"] = result.inserted_id
+    except DuplicateKeyError:
+        job = await db.drive_upload_jobs.find_one({"note_id": note_id})
+    return job
+
+
+async def claim_next(worker_id: str) -> Optional[dict]:
+    """
+    Atomically take the next due job (or one abandoned by a crashed worker).
+    The returned job carries the claim the other transitions require.
+    Abandoned jobs out of attempts are marked failed instead.
+    """
+    db = get_database()
+    now = datetime.utcnow()
+    max_attempts = settings.DRIVE_JOBS_MAX_ATTEMPTS
+    await db.drive_upload_jobs.update_many(
+        {"status": "running", "locked_until": {"$lt": now}, "attempts": {"$gte": max_attempts}},
+        {
+            "$set": {
+                "status": "failed",
+                "error": f"Worker lost after {max_attempts} attempts",
+                "locked_until": None,
+                "updated_at": now,
+            }
+        },
+    )
+    return await db.drive_upload_jobs.find_one_and_update(
+        {
+            "$or": [
+                {"status": "queued", "run_at": {"$lte": now}},
+                {"status": "running", "locked_until": {"$lt": now}, "attempts": {"$lt": max_attempts}},
+            ]
+        },
+        {
+            "$set": {
+                "status": "running",
+                "worker": worker_id,
+                "claim": uuid.uuid4().hex,
+                "locked_until": now + timedelta(seconds=settings.DRIVE_JOBS_LEASE_SECONDS),
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("run_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _claimed(job: dict) -> dict:
+    """Filter matching ``job`` only while the claim it was returned with holds."""
+    return {"_id": job["_id"], "status": "running", "worker": job["worker"], "claim": job["claim"]}
+
+
+async def report_progress(job: dict, bytes_uploaded: int) -> bool:
+    """Record progress and extend the lease. False if the claim was lost."""
+    db = get_database()
+    now = datetime.utcnow()
+    result = await db.drive_upload_jobs.update_one(
+        _claimed(job),
+        {
+            "$set": {
+                "bytes_uploaded": bytes_uploaded,
+                "locked_until": now + timedelta(seconds=settings.DRIVE_JOBS_LEASE_SECONDS),
+                "updated_at": now,
+            }
+        },
+    )
+    return result.matched_count > 0
+
+
+async def complete(job: dict, drive_url: str) -> bool:
+    """Mark the job done. False if the claim was lost."""
+    db = get_database()
+    result = await db.drive_upload_jobs.update_one(
+        _claimed(job),
+        {
+            "$set": {
+                "status": "done",
+                "drive_url": drive_url,
+                "bytes_uploaded": job["size"],
+                "locked_until": None,
+                "error": None,
+                "updated_at": datetime.utcnow(),
+            }
+        },
+    )
+    return result.matched_count > 0
+
+
+async def cancel(job: dict, reason: str) -> bool:
+    """Drop a job that no longer makes sense (e.g. its note was deleted). False if the claim was lost."""
+    db = get_database()
+    result = await db.drive_upload_jobs.update_one(
+        _claimed(job),
+        {"$set": {"status": "cancelled", "error": reason, "locked_until": None, "updated_at": datetime.utcnow()}},
+    )
+    return result.matched_count > 0
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with jitter: base * 2^(attempts - 1), +/-20%."""
+    delay = min(MAX_BACKOFF_SECONDS, settings.DRIVE_JOBS_BACKOFF_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+async def fail(job: dict, error: str) -> Optional[str]:
+    """
+    Schedule a retry, or give up after DRIVE_JOBS_MAX_ATTEMPTS. Returns the
+    new status, or None if the claim was lost.
+    """
+    db = get_database()
+    now = datetime.utcnow()
+    status = "queued" if job["attempts"] < settings.DRIVE_JOBS_MAX_ATTEMPTS else "failed"
+    update = {"status": status, "error": error, "locked_until": None, "updated_at": now}
+    if status == "queued":
+        update["run_at"] = now + timedelta(seconds=backoff_seconds(job["attempts"]))
+    result = await db.drive_upload_jobs.update_one(_claimed(job), {"$set": update})
+    return status if result.matched_count else None
+
+
+async def get_note_upload(note_id: str, user_id: str) -> Optional[dict]:
+    db = get_database()
+    return await db.drive_upload_jobs.find_one({"note_id": note_id, "user_id": user_id})
@@ -1,11 +1,39 @@
-from typing import Optional, List
+import re
+from typing import AsyncIterator, Dict, Optional, List, Tuple
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError
+from app.core.pagination import keyset_filter
+from app.crud import crud_sync
 from app.db.mongodb_utils import get_database
+from app.services.events import change_broker
+from app.services.typeahead import typeahead_index
 from app.models.note import NoteCreate, NoteUpdate
 
+CONTENT_PREVIEW_LENGTH = 200
+SNIPPET_LENGTH = 160
 
-def create_note(note: NoteCreate, user_id: str) -> dict:
+PAGE_SORT = [("created_at", ASCENDING), ("_id", ASCENDING)]
+
+# Documents fetched per round trip while exporting
+EXPORT_BATCH_SIZE = 500
+
+# Projection backing the "summary" list view: the content is truncated
+# server-side so full note bodies never leave the database.
+SUMMARY_PROJECTION = {
+    "title": 1,
+    "folder": 1,
+    "tags": 1,
+    "note_type": 1,
+    "video_url": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "content_preview": {"$substrCP": [{"$ifNull": ["$content", ""]}, 0, CONTENT_PREVIEW_LENGTH]},
+}
+
+
+async def create_note(note: NoteCreate, user_id: str) -> dict:
     """Create a new note."""
     db = get_database()
     note_dict = note.model_dump()
@@ -13,68 +41,188 @@ def create_note(note: NoteCreate, user_id: str) -> dict:
     note_dict["created_at"] = datetime.utcnow()
     note_dict["updated_at"] = datetime.utcnow()
     
-    result = db.notes.insert_one(note_dict)
+    async with crud_sync.sequence(user_id) as seq:
+        note_dict["sync_seq"] = seq
+        result = await db.notes.insert_one(note_dict)
+    note_dict.pop("sync_seq")
     note_dict["id"] = str(result.inserted_id)
     note_dict.pop("_id", None)
+    typeahead_index.upsert(user_id, "note", note_dict["id"], note_dict["title"])
+    change_broker.publish(user_id, "note", "created", [note_dict["id"]])
     return note_dict
 
 
-def get_note(note_id: str, user_id: str) -> Optional[dict]:
+async def insert_notes(notes: List[NoteCreate], user_id: str) -> Dict[int, str]:
+    """
+    Insert a batch of notes with one unordered insert_many.
+
+    Returns {position: error} for the notes that could not be written.
+    """
+    db = get_database()
+    now = datetime.utcnow()
+    docs = []
+    for note in notes:
+        doc = note.model_dump()
+        doc.update(_id=ObjectId(), user_id=user_id, created_at=now, updated_at=now)
+        docs.append(doc)
+    
+    failed = {}
+    async with crud_sync.sequence(user_id, len(docs)) as first:
+        for offset, doc in enumerate(docs):
+            doc["sync_seq"] = first + offset
+        try:
+            await db.notes.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed[write_error["index"]] = write_error.get("errmsg", "Write failed")
+    
+    inserted = [doc for position, doc in enumerate(docs) if position not in failed]
+    for doc in inserted:
+        typeahead_index.upsert(user_id, "note", str(doc["_id"]), doc["title"])
+    change_broker.publish(user_id, "note", "created", [str(doc["_id"]) for doc in inserted])
+    return failed
+
+
+async def get_note(note_id: str, user_id: str) -> Optional[dict]:
     """Get a note by ID."""
     db = get_database()
-    note = db.notes.find_one({"_id": ObjectId(note_id), "user_id": user_id})
+    note = await db.notes.find_one({"_id": ObjectId(note_id), "user_id": user_id})
     if note:
         note["id"] = str(note["_id"])
         del note["_id"]
     return note
 
 
-def get_notes(user_id: str, skip: int = 0, limit: int = 100) -> List[dict]:
-    """Get all notes for a user."""
+async def get_notes(
+    user_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    summary: bool = False,
+    after: Optional[Tuple[datetime, ObjectId]] = None
+) -> List[dict]:
+    """
+    Get notes for a user, ordered by (created_at, _id).
+
+    With ``after`` the page starts right after that sort key (keyset
+    pagination, ``skip`` is ignored). With ``summary`` only a content
+    preview is read.
+    """
     db = get_database()
-    notes = list(db.notes.find({"user_id": user_id}).skip(skip).limit(limit))
+    query = {"user_id": user_id}
+    if after:
+        query.update(keyset_filter(after))
+    projection = SUMMARY_PROJECTION if summary else None
+    cursor = db.notes.find(query, projection).sort(PAGE_SORT).limit(limit)
+    if not after:
+        # Legacy offset pagination
+        cursor = cursor.skip(skip)
+    notes = await cursor.to_list(length=None)
     for note in notes:
         note["id"] = str(note["_id"])
         del note["_id"]
     return notes
 
 
-def search_notes(user_id: str, query: str) -> List[dict]:
-    """Search notes by title or content."""
+def _search_terms(query: str) -> List[str]:
+    """
+    Split a user query into plain words.
+
+    Quotes and leading dashes would be interpreted as phrase and negation
+    operators by ``$text``; keeping only word characters makes the query literal.
+    """
+    return re.findall(r"\w+", query)
+
+
+def _highlights(text: str, pattern: "re.Pattern") -> List[Tuple[int, int]]:
+    return [match.span() for match in pattern.finditer(text)]
+
+
+def _snippet(content: str, pattern: "re.Pattern") -> str:
+    """Window of the content centred on the first matching term."""
+    if len(content) <= SNIPPET_LENGTH:
+        return content
+    match = pattern.search(content)
+    if not match:
+        return content[:SNIPPET_LENGTH]
+    start = max(match.start() - SNIPPET_LENGTH // 3, 0)
+    start = min(start, len(content) - SNIPPET_LENGTH)
+    return content[start:start + SNIPPET_LENGTH]
+
+
+async def search_notes(user_id: str, query: str, skip: int = 0, limit: int = 20) -> List[dict]:
+    """
+    Search notes by title or content using the text index.
+
+    Results are ranked by text score (title matches weigh more than content
+    matches) and carry a snippet of the content with highlight offsets.
+    """
+    terms = _search_terms(query)
+    if not terms:
+        return []
+    
     db = get_database()
-    notes = list(db.notes.find({
-        "user_id": user_id,
-        "$or": [
-            {"title": {"$regex": query, "$options": "i"}},
-            {"content": {"$regex": query, "$options": "i"}}
-        ]
-    }))
+    cursor = db.notes.find(
+        {"user_id": user_id, "$text": {"$search": " ".join(terms)}},
+        {"score": {"$meta": "textScore"}}
+    ).sort([("score", {"$meta": "textScore"})]).skip(skip).limit(limit)
+    notes = await cursor.to_list(length=None)
+    
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
     for note in notes:
         note["id"] = str(note["_id"])
         del note["_id"]
+        note["snippet"] = _snippet(note.get("content") or "", pattern)
+        note["highlights"] = _highlights(note["snippet"], pattern)
+        note["title_highlights"] = _highlights(note.get("title") or "", pattern)
     return notes
 
 
-def update_note(note_id: str, note_update: NoteUpdate, user_id: str) -> Optional[dict]:
+async def iter_notes(user_id: str, include_video: bool = False) -> AsyncIterator[dict]:
+    """
+    Every note of a user, in creation order, streamed from the cursor.
+
+    Video notes (and the ``video_url`` field) are only included on request.
+    """
+    db = get_database()
+    query = {"user_id": user_id}
+    projection = {"user_id": 0, "sync_seq": 0}
+    if not include_video:
+        query["note_type"] = {"$ne": "video"}
+        projection.update(video_url=0, video_size=0, video_sha256=0)
+    cursor = db.notes.find(query, projection).sort(PAGE_SORT).batch_size(EXPORT_BATCH_SIZE)
+    async for note in cursor:
+        yield note
+
+
+async def update_note(note_id: str, note_update: NoteUpdate, user_id: str) -> Optional[dict]:
     """Update a note."""
     db = get_database()
     update_dict = {k: v for k, v in note_update.model_dump().items() if v is not None}
     update_dict["updated_at"] = datetime.utcnow()
     
-    result = db.notes.find_one_and_update(
-        {"_id": ObjectId(note_id), "user_id": user_id},
-        {"$set": update_dict},
-        return_document=True
-    )
+    async with crud_sync.sequence(user_id) as seq:
+        result = await db.notes.find_one_and_update(
+            {"_id": ObjectId(note_id), "user_id": user_id},
+            {"$set": {**update_dict, "sync_seq": seq}},
+            projection={"sync_seq": 0},
+            return_document=True
+        )
     
     if result:
         result["id"] = str(result["_id"])
         del result["_id"]
+        if "title" in update_dict:
+            typeahead_index.upsert(user_id, "note", result["id"], result["title"])
+        change_broker.publish(user_id, "note", "updated", [result["id"]])
     return result
 
 
-def delete_note(note_id: str, user_id: str) -> bool:
+async def delete_note(note_id: str, user_id: str) -> bool:
     """Delete a note."""
     db = get_database()
-    result = db.notes.delete_one({"_id": ObjectId(note_id), "user_id": user_id})
+    result = await db.notes.delete_one({"_id": ObjectId(note_id), "user_id": user_id})
+    if result.deleted_count:
+        typeahead_index.remove(user_id, "note", note_id)
+        await crud_sync.record_deletions(user_id, "note", [note_id])
+        change_broker.publish(user_id, "note", "deleted", [note_id])
     return result.deleted_count > 0
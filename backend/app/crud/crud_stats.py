@@ -0,0 +1,99 @@
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+from app.db.mongodb_utils import get_database
+
+# One document per user in task_stats, maintained with $inc by the task
+# write paths:
+#   {_id: user_id, total, running, by_status: {...}, by_priority: {...},
+#    by_quadrant: {...}, open_due: {"YYYY-MM-DD": n}, reconciled_at}
+# Overdue depends on the current date, so open tasks are counted per due
+# day and summed at read time.
+
+NO_QUADRANT = "none"
+
+# Task fields the counters depend on
+PROJECTION = {"status": 1, "priority": 1, "eisenhower_quadrant": 1, "is_running": 1, "due_date": 1}
+
+
+def field_value(field):
+    """Enum members (from model_dump) and raw strings (from Mongo) alike."""
+    return getattr(field, "value", field)
+
+
+def contribution(task: Optional[dict]) -> Counter:
+    """Counters a single task adds to its owner's stats document."""
+    counters = Counter()
+    if not task:
+        return counters
+    status = field_value(task.get("status")) or "backlog"
+    counters["total"] = 1
+    counters[f"by_status.{status}"] = 1
+    counters[f"by_priority.{field_value(task.get('priority')) or 'medium'}"] = 1
+    counters[f"by_quadrant.{field_value(task.get('eisenhower_quadrant')) or NO_QUADRANT}"] = 1
+    if task.get("is_running"):
+        counters["running"] = 1
+    if task.get("due_date") and status != "done":
+        counters[f"open_due.{task['due_date'].strftime('%Y-%m-%d')}"] = 1
+    return counters
+
+
+def delta(before: Optional[dict], after: Optional[dict]) -> dict:
+    """Signed ``$inc`` document turning ``before``'s contribution into ``after``'s."""
+    counters = contribution(after)
+    counters.subtract(contribution(before))
+    return {field: value for field, value in counters.items() if value}
+
+
+async def apply_changes(user_id: str, changes: Iterable[Tuple[Optional[dict], Optional[dict]]]) -> None:
+    """Apply (before, after) task transitions to the user's stats with one $inc."""
+    inc = Counter()
+    for before, after in changes:
+        inc.update(delta(before, after))
+    inc = {field: value for field, value in inc.items() if value}
+    if inc:
+        db = get_database()
+        await db.task_stats.update_one({"_id": user_id}, {"$inc": inc}, upsert=True)
+
+
+async def apply_change(user_id: str, before: Optional[dict], after: Optional[dict]) -> None:
+    await apply_changes(user_id, [(before, after)])
+
+
+async def recompute(user_id: str) -> dict:
+    """Rebuild a user's stats document from the tasks collection."""
+    db = get_database()
+    counters = Counter()
+    cursor = db.tasks.find({"user_id": user_id}, PROJECTION)
+    async for task in cursor:
+        counters.update(contribution(task))
+
+    doc = {"_id": user_id, "total": 0, "running": 0, "reconciled_at": datetime.utcnow()}
+    for field, value in counters.items():
+        if "." in field:
+            group, key = field.split(".", 1)
+            doc.setdefault(group, {})[key] = value
+        else:
+            doc[field] = value
+    await db.task_stats.replace_one({"_id": user_id}, doc, upsert=True)
+    return doc
+
+
+async def get_task_stats(user_id: str) -> dict:
+    """Dashboard counters of a user, from a single point read."""
+    db = get_database()
+    doc = await db.task_stats.find_one({"_id": user_id})
+    if not doc or "reconciled_at" not in doc:
+        # First read for a user whose tasks predate the counters
+        doc = await recompute(user_id)
+
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    open_due = doc.get("open_due") or {}
+    return {
+        "total": doc.get("total", 0),
+        "running": doc.get("running", 0),
+        "overdue": sum(count for day, count in open_due.items() if day < today),
+        "by_status": {key: value for key, value in (doc.get("by_status") or {}).items() if value},
+        "by_priority": {key: value for key, value in (doc.get("by_priority") or {}).items() if value},
+        "by_quadrant": {key: value for key, value in (doc.get("by_quadrant") or {}).items() if value},
+    }
@@ -0,0 +1,221 @@
+import base64
+import json
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional
+from pymongo import ASCENDING, ReturnDocument
+from app.core.config import settings
+from app.db.mongodb_utils import get_database
+
+# Every task, note and tombstone write is stamped with a per-user sequence
+# number, ``sync_seq``, taken with $inc from the user's counter document:
+#   {_id: user_id, seq, pending: {token: {at, floor}}}
+# A writer takes its numbers and registers in ``pending`` with the first
+# of them (``floor``) in one atomic update, and leaves once its write is
+# done. Readers never go past the lowest floor of a write still in flight,
+# so a write that commits late cannot land behind a token already handed
+# out. Entries older than SYNC_PENDING_TIMEOUT_SECONDS belong to crashed
+# writers: readers ignore them and remove them.
+#
+# Deletions are kept as tombstones until the TTL index removes them:
+#   {user_id, kind: "task" | "note", item_id, deleted_at, sync_seq}
+#
+# A sync token records the sequence window being read, (since, until], and
+# how far each source has been paged through it:
+#   {"v": 2, "since": int | null, "at": iso, "until": int | null,
+#    "after": {source: int}, "done": [source]}
+# ``at`` is when ``since`` was handed out, to detect expired tombstones.
+TOKEN_VERSION = 2
+
+SOURCES = (
+    ("tasks", "tasks"),
+    ("notes", "notes"),
+    ("deleted", "tombstones"),
+)
+
+
+class SyncTokenExpired(Exception):
+    """The token predates the oldest tombstones still kept."""
+
+
+def encode_token(state: dict) -> str:
+    raw = json.dumps(state, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_token(token: str) -> dict:
+    """
+    Decode a token produced by ``encode_token``. Raises ValueError if invalid
+    and SyncTokenExpired for tokens of the former, time based, format.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception as e:
+        raise ValueError("Invalid sync token") from e
+    if not isinstance(state, dict) or state.get("v") != TOKEN_VERSION:
+        raise SyncTokenExpired()
+    try:
+        return {
+            "since": int(state["since"]) if state.get("since") is not None else None,
+            "at": datetime.fromisoformat(state["at"]),
+            "until": int(state["until"]) if state.get("until") is not None else None,
+            "after": {source: int(value) for source, value in (state.get("after") or {}).items()},
+            "done": list(state.get("done") or []),
+        }
+    except Exception as e:
+        raise ValueError("Invalid sync token") from e
+
+
+def _state_token(since: Optional[int], at: datetime, until: Optional[int], after: dict, done: List[str]) -> str:
+    return encode_token({
+        "v": TOKEN_VERSION,
+        "since": since,
+        "at": at.isoformat(),
+        "until": until,
+        "after": after,
+        "done": done,
+    })
+
+
+@asynccontextmanager
+async def sequence(user_id: str, count: int = 1) -> AsyncIterator[int]:
+    """
+    Reserve ``count`` consecutive sync sequence numbers for one write.
+
+    Yields the first one; the write must happen inside the block. Costs one
+    round trip before the write and one after.
+    """
+    db = get_database()
+    token = uuid.uuid4().hex
+    seq = {"$ifNull": ["$seq", 0]}
+    counter = await db.sync_counters.find_one_and_update(
+        {"_id": user_id},
+        [{"$set": {
+            "seq": {"$add": [seq, count]},
+            f"pending.{token}": {"at": datetime.utcnow(), "floor": {"$add": [seq, 1]}},
+        }}],
+        projection={"seq": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    try:
+        yield counter["seq"] - count + 1
+    finally:
+        await db.sync_counters.update_one({"_id": user_id}, {"$unset": {f"pending.{token}": ""}})
+
+
+async def _counter(user_id: str, now: datetime) -> Optional[dict]:
+    """The user's counter document, without the entries of crashed writers."""
+    db = get_database()
+    counter = await db.sync_counters.find_one({"_id": user_id})
+    if not counter:
+        return None
+    stale = now - timedelta(seconds=settings.SYNC_PENDING_TIMEOUT_SECONDS)
+    pending = counter.get("pending") or {}
+    abandoned = [key for key, entry in pending.items() if entry["at"] < stale]
+    if abandoned:
+        await db.sync_counters.update_one(
+            {"_id": user_id}, {"$unset": {f"pending.{key}": "" for key in abandoned}}
+        )
+    counter["pending"] = {key: entry for key, entry in pending.items() if key not in abandoned}
+    return counter
+
+
+async def readable_sequence(user_id: str, now: Optional[datetime] = None) -> int:
+    """Highest sequence number below every write still in flight: everything up to it is committed."""
+    counter = await _counter(user_id, now or datetime.utcnow())
+    if not counter:
+        return 0
+    readable = counter.get("seq", 0)
+    for entry in counter["pending"].values():
+        readable = min(readable, entry["floor"] - 1)
+    return readable
+
+
+async def data_version(user_id: str) -> str:
+    """
+    Version of the user's tasks and notes, for list ETags. Changes whenever
+    a write takes its numbers and again when it commits (leaves
+    ``pending``), so a list read while a write is in flight is never
+    validated once that write is visible.
+    """
+    counter = await _counter(user_id, datetime.utcnow())
+    if not counter:
+        return "0"
+    return ":".join([str(counter.get("seq", 0)), *sorted(counter["pending"])])
+
+
+async def record_deletions(user_id: str, kind: str, item_ids: List[str]) -> None:
+    """Leave a tombstone for each deleted task or note."""
+    if not item_ids:
+        return
+    db = get_database()
+    now = datetime.utcnow()
+    async with sequence(user_id, len(item_ids)) as first:
+        await db.tombstones.insert_many([
+            {"user_id": user_id, "kind": kind, "item_id": item_id, "deleted_at": now, "sync_seq": first + offset}
+            for offset, item_id in enumerate(item_ids)
+        ])
+
+
+async def get_changes(user_id: str, token: Optional[str], limit: int) -> dict:
+    """
+    Tasks and notes created or updated, and items deleted, since ``token``.
+
+    Without a token every task and note is returned (initial sync). Each
+    source returns at most ``limit`` items per call; ``has_more`` tells the
+    client to call again with ``next_token`` straight away.
+
+    Raises ValueError for a malformed token and SyncTokenExpired when
+    deletions since the token may already have expired.
+    """
+    db = get_database()
+    now = datetime.utcnow()
+    if token:
+        state = decode_token(token)
+    else:
+        state = {"since": None, "at": now, "until": None, "after": {}, "done": []}
+    since, after, done = state["since"], state["after"], state["done"]
+    until = state["until"] if state["until"] is not None else await readable_sequence(user_id, now)
+
+    horizon = now - timedelta(days=settings.SYNC_TOMBSTONE_TTL_DAYS)
+    if since is not None and state["at"] < horizon:
+        raise SyncTokenExpired()
+
+    if since is None and "deleted" not in done:
+        # An initial sync has nothing to delete
+        done.append("deleted")
+
+    changes = {"tasks": [], "notes": [], "deleted": []}
+    for source, collection in SOURCES:
+        if source in done:
+            continue
+        query = {"user_id": user_id, "sync_seq": {"$lte": until}}
+        lower = after.get(source, since)
+        if lower is not None:
+            query["sync_seq"]["$gt"] = lower
+        cursor = db[collection].find(query).sort("sync_seq", ASCENDING).limit(limit + 1)
+        docs = await cursor.to_list(length=None)
+        if len(docs) > limit:
+            docs = docs[:limit]
+            after[source] = docs[-1]["sync_seq"]
+        else:
+            after.pop(source, None)
+            done.append(source)
+
+        for doc in docs:
+            del doc["sync_seq"]
+            if source == "deleted":
+                changes["deleted"].append({"kind": doc["kind"], "id": doc["item_id"], "deleted_at": doc["deleted_at"]})
+            else:
+                doc["id"] = str(doc.pop("_id"))
+                changes[source].append(doc)
+
+    has_more = len(done) < len(SOURCES)
+    if has_more:
+        next_token = _state_token(since, state["at"], until, after, done)
+    else:
+        next_token = _state_token(until, now, None, {}, [])
+    return {**changes, "next_token": next_token, "has_more": has_more}
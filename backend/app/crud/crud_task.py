@@ -1,11 +1,53 @@
-from typing import Optional, List
-from datetime import datetime
+import asyncio
+from typing import AsyncIterator, Dict, Optional, List, Tuple
+from datetime import datetime, timedelta, timezone
 from bson import ObjectId
+from pymongo import ASCENDING, DeleteOne, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.core.pagination import keyset_filter
+from app.crud import crud_analytics, crud_stats, crud_sync
 from app.db.mongodb_utils import get_database
-from app.models.task import TaskCreate, TaskUpdate
+from app.services.events import change_broker
+from app.services.typeahead import typeahead_index
+from app.models.task import TaskCreate, TaskUpdate, TaskBulkOperation
 
+PAGE_SORT = [("created_at", ASCENDING), ("_id", ASCENDING)]
 
-def create_task(task: TaskCreate, user_id: str) -> dict:
+# Documents fetched per round trip while exporting
+EXPORT_BATCH_SIZE = 500
+
+TIME_ENTRY_BUCKET_SIZE = 200
+
+# Projection backing the "summary" list view: badge fields only, with the
+# subtask counters computed server-side instead of shipping the subtasks.
+SUMMARY_PROJECTION = {
+    "title": 1,
+    "status": 1,
+    "priority": 1,
+    "due_date": 1,
+    "tags": 1,
+    "board_id": 1,
+    "list_name": 1,
+    "eisenhower_quadrant": 1,
+    "total_time_spent": 1,
+    "is_running": 1,
+    "current_session_start": 1,
+    "completion_date": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "subtasks_total": {"$size": {"$ifNull": ["$subtasks", []]}},
+    "subtasks_completed": {
+        "$size": {
+            "$filter": {
+                "input": {"$ifNull": ["$subtasks", []]},
+                "cond": {"$eq": ["$$this.completed", True]}
+            }
+        }
+    },
+}
+
+
+async def create_task(task: TaskCreate, user_id: str) -> dict:
     """Create a new task."""
     db = get_database()
     task_dict = task.model_dump()
@@ -13,188 +55,568 @@ def create_task(task: TaskCreate, user_id: str) -> dict:
     task_dict["created_at"] = datetime.utcnow()
     task_dict["updated_at"] = datetime.utcnow()
     
-    result = db.tasks.insert_one(task_dict)
+    async with crud_sync.sequence(user_id) as seq:
+        task_dict["sync_seq"] = seq
+        result = await db.tasks.insert_one(task_dict)
+    task_dict.pop("sync_seq")
     task_dict["id"] = str(result.inserted_id)
     task_dict.pop("_id", None)
+    typeahead_index.upsert(user_id, "task", task_dict["id"], task_dict["title"])
+    await crud_stats.apply_change(user_id, None, task_dict)
+    change_broker.publish(user_id, "task", "created", [task_dict["id"]])
     return task_dict
 
 
-def get_task(task_id: str, user_id: str) -> Optional[dict]:
+async def insert_tasks(tasks: List[TaskCreate], user_id: str) -> Dict[int, str]:
+    """
+    Insert a batch of tasks with one unordered insert_many.
+
+    Returns {position: error} for the tasks that could not be written.
+    """
+    db = get_database()
+    now = datetime.utcnow()
+    docs = []
+    for task in tasks:
+        doc = task.model_dump()
+        doc.update(_id=ObjectId(), user_id=user_id, created_at=now, updated_at=now)
+        docs.append(doc)
+    
+    failed = {}
+    async with crud_sync.sequence(user_id, len(docs)) as first:
+        for offset, doc in enumerate(docs):
+            doc["sync_seq"] = first + offset
+        try:
+            await db.tasks.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed[write_error["index"]] = write_error.get("errmsg", "Write failed")
+    
+    inserted = [doc for position, doc in enumerate(docs) if position not in failed]
+    for doc in inserted:
+        typeahead_index.upsert(user_id, "task", str(doc["_id"]), doc["title"])
+    await crud_stats.apply_changes(user_id, [(None, doc) for doc in inserted])
+    change_broker.publish(user_id, "task", "created", [str(doc["_id"]) for doc in inserted])
+    return failed
+
+
+async def get_task(task_id: str, user_id: str) -> Optional[dict]:
     """Get a task by ID."""
     db = get_database()
-    task = db.tasks.find_one({"_id": ObjectId(task_id), "user_id": user_id})
+    task = await db.tasks.find_one({"_id": ObjectId(task_id), "user_id": user_id})
     if task:
         task["id"] = str(task["_id"])
         del task["_id"]
     return task
 
 
-def get_tasks(user_id: str, skip: int = 0, limit: int = 100) -> List[dict]:
-    """Get all tasks for a user."""
+async def get_tasks(
+    user_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    summary: bool = False,
+    after: Optional[Tuple[datetime, ObjectId]] = None
+) -> List[dict]:
+    """
+    Get tasks for a user, ordered by (created_at, _id).
+
+    With ``after`` the page starts right after that sort key (keyset
+    pagination, ``skip`` is ignored). With ``summary`` only list view
+    fields are read.
+    """
     db = get_database()
-    tasks = list(db.tasks.find({"user_id": user_id}).skip(skip).limit(limit))
+    query = {"user_id": user_id}
+    if after:
+        query.update(keyset_filter(after))
+    projection = SUMMARY_PROJECTION if summary else None
+    cursor = db.tasks.find(query, projection).sort(PAGE_SORT).limit(limit)
+    if not after:
+        # Legacy offset pagination
+        cursor = cursor.skip(skip)
+    tasks = await cursor.to_list(length=None)
     for task in tasks:
         task["id"] = str(task["_id"])
         del task["_id"]
     return tasks
 
 
-def update_task(task_id: str, task_update: TaskUpdate, user_id: str) -> Optional[dict]:
+async def iter_tasks(user_id: str) -> AsyncIterator[dict]:
+    """Every task of a user, in creation order, streamed from the cursor."""
+    db = get_database()
+    # closed_by: session tag stored by earlier versions of the timer routes
+    projection = {"user_id": 0, "sync_seq": 0, "last_time_entry.closed_by": 0}
+    cursor = db.tasks.find({"user_id": user_id}, projection).sort(PAGE_SORT).batch_size(EXPORT_BATCH_SIZE)
+    async for task in cursor:
+        yield task
+
+
+async def update_task(task_id: str, task_update: TaskUpdate, user_id: str) -> Optional[dict]:
     """Update a task."""
     db = get_database()
     # Get all fields that were explicitly provided in the update
-    update_dict = task_update.model_dump(exclude_unset=True)
-    update_dict["updated_at"] = datetime.utcnow()
+    update_dict = {key: _as_stored(value) for key, value in task_update.model_dump(exclude_unset=True).items()}
+    update_dict["updated_at"] = _now()
     
-    result = db.tasks.find_one_and_update(
-        {"_id": ObjectId(task_id), "user_id": user_id},
-        {"$set": update_dict},
-        return_document=True
-    )
+    # The dashboard counters move from the previous document; the response is
+    # built from it, with the values as MongoDB stores them.
+    async with crud_sync.sequence(user_id) as seq:
+        before = await db.tasks.find_one_and_update(
+            {"_id": ObjectId(task_id), "user_id": user_id},
+            {"$set": {**update_dict, "sync_seq": seq}},
+            projection={"sync_seq": 0},
+            return_document=ReturnDocument.BEFORE
+        )
+    if not before:
+        return None
     
-    if result:
-        result["id"] = str(result["_id"])
-        del result["_id"]
+    before["id"] = str(before.pop("_id"))
+    result = {**before, **update_dict}
+    if "title" in update_dict:
+        typeahead_index.upsert(user_id, "task", result["id"], result["title"])
+    await crud_stats.apply_change(user_id, before, result)
+    change_broker.publish(user_id, "task", "updated", [result["id"]])
     return result
 
 
-def delete_task(task_id: str, user_id: str) -> bool:
+async def delete_task(task_id: str, user_id: str) -> bool:
     """Delete a task."""
     db = get_database()
-    result = db.tasks.delete_one({"_id": ObjectId(task_id), "user_id": user_id})
-    return result.deleted_count > 0
+    deleted = await db.tasks.find_one_and_delete(
+        {"_id": ObjectId(task_id), "user_id": user_id},
+        projection=crud_stats.PROJECTION
+    )
+    if not deleted:
+        return False
+    
+    await db.time_entries.delete_many({"task_id": task_id, "user_id": user_id})
+    typeahead_index.remove(user_id, "task", task_id)
+    await crud_stats.apply_change(user_id, deleted, None)
+    await crud_sync.record_deletions(user_id, "task", [task_id])
+    change_broker.publish(user_id, "task", "deleted", [task_id])
+    return True
+
+
+def _bulk_operation_error(op: TaskBulkOperation) -> Optional[str]:
+    if op.op == "create":
+        return None if op.task else "'task' is required"
+    if not op.id or not ObjectId.is_valid(op.id):
+        return "A valid 'id' is required"
+    if op.op == "update" and not op.update:
+        return "'update' is required"
+    if op.op == "set_status" and not op.status:
+        return "'status' is required"
+    return None
 
 
-def start_timer(task_id: str, user_id: str) -> Optional[dict]:
-    """Start the timer for a task."""
+def _bulk_request(write: tuple, seq: int):
+    """pymongo request of a planned bulk write, stamped with its sync sequence number."""
+    if write[0] == "insert":
+        return InsertOne({**write[1], "sync_seq": seq})
+    if write[0] == "delete":
+        return DeleteOne(write[1])
+    return UpdateOne(write[1], {"$set": {**write[2], "sync_seq": seq}})
+
+
+async def bulk_tasks(
+    user_id: str,
+    operations: List[TaskBulkOperation],
+    ordered: bool = False,
+    fetch_ids: Optional[List[str]] = None
+) -> dict:
+    """
+    Apply many task operations with a single bulk_write.
+
+    Returns one result per operation, in order, plus the tasks listed in
+    ``fetch_ids`` as they are after the writes. Operations on tasks that do
+    not exist are reported as ``not_found`` and do not stop ordered batches.
+    """
     db = get_database()
+    now = datetime.utcnow()
+    results = [
+        {"index": index, "op": op.op, "id": op.id, "status": "ok", "error": None}
+        for index, op in enumerate(operations)
+    ]
     
-    # Check if task exists and is not already running
-    task = db.tasks.find_one({"_id": ObjectId(task_id), "user_id": user_id})
-    if not task:
-        return None
+    # One read for the current state of every referenced task, needed for
+    # not_found reporting and the dashboard counters.
+    referenced = [
+        ObjectId(op.id) for op in operations
+        if op.op != "create" and op.id and ObjectId.is_valid(op.id)
+    ]
+    current = {}
+    if referenced:
+        cursor = db.tasks.find(
+            {"_id": {"$in": referenced}, "user_id": user_id},
+            {**crud_stats.PROJECTION, "title": 1}
+        )
+        async for doc in cursor:
+            current[str(doc["_id"])] = doc
     
-    if task.get("is_running", False):
-        # Already running, return current state
-        task["id"] = str(task["_id"])
-        del task["_id"]
-        return task
+    writes, planned = [], []  # planned[i]: (operation index, before, after) of writes[i]
+    halted = False
+    for index, op in enumerate(operations):
+        result = results[index]
+        if halted:
+            result["status"] = "skipped"
+            continue
+        
+        error = _bulk_operation_error(op)
+        if error:
+            result.update(status="invalid", error=error)
+            halted = ordered
+            continue
+        
+        if op.op == "create":
+            doc = op.task.model_dump()
+            doc.update(_id=ObjectId(), user_id=user_id, created_at=now, updated_at=now)
+            result["id"] = str(doc["_id"])
+            writes.append(("insert", doc))
+            planned.append((index, None, doc))
+            continue
+        
+        before = current.get(op.id)
+        if before is None:
+            result["status"] = "not_found"
+            continue
+        
+        task_filter = {"_id": ObjectId(op.id), "user_id": user_id}
+        if op.op == "delete":
+            writes.append(("delete", task_filter))
+            planned.append((index, before, None))
+            del current[op.id]
+        else:
+            if op.op == "update":
+                changes = op.update.model_dump(exclude_unset=True)
+            else:
+                changes = {"status": op.status}
+            changes["updated_at"] = now
+            after = {**before, **changes}
+            writes.append(("update", task_filter, changes))
+            planned.append((index, before, after))
+            current[op.id] = after
     
-    # Start the timer
-    now = datetime.utcnow()
-    result = db.tasks.find_one_and_update(
-        {"_id": ObjectId(task_id), "user_id": user_id},
+    failed = {}
+    executed = len(writes)
+    if writes:
+        async with crud_sync.sequence(user_id, len(writes)) as first:
+            requests = [_bulk_request(write, first + offset) for offset, write in enumerate(writes)]
+            try:
+                await db.tasks.bulk_write(requests, ordered=ordered)
+            except BulkWriteError as e:
+                for write_error in e.details.get("writeErrors", []):
+                    failed[write_error["index"]] = write_error.get("errmsg", "Write failed")
+                if ordered and failed:
+                    executed = min(failed) + 1
+    
+    applied = []
+    for position, (index, before, after) in enumerate(planned):
+        if position in failed:
+            results[index].update(status="error", error=failed[position])
+        elif position >= executed:
+            results[index]["status"] = "skipped"
+        else:
+            applied.append((before, after))
+    
+    deleted_ids = []
+    for before, after in applied:
+        if after is None:
+            deleted_ids.append(str(before["_id"]))
+            typeahead_index.remove(user_id, "task", str(before["_id"]))
+        elif before is None or after.get("title") != before.get("title"):
+            typeahead_index.upsert(user_id, "task", str(after["_id"]), after["title"])
+    if deleted_ids:
+        await db.time_entries.delete_many({"task_id": {"$in": deleted_ids}, "user_id": user_id})
+        await crud_sync.record_deletions(user_id, "task", deleted_ids)
+    await crud_stats.apply_changes(user_id, applied)
+    for op, ids in (
+        ("created", [str(after["_id"]) for before, after in applied if before is None]),
+        ("updated", [str(after["_id"]) for before, after in applied if before and after]),
+        ("deleted", deleted_ids),
+    ):
+        change_broker.publish(user_id, "task", op, ids)
+    
+    tasks = []
+    fetch = [ObjectId(task_id) for task_id in fetch_ids or [] if ObjectId.is_valid(task_id)]
+    if fetch:
+        found = {}
+        async for task in db.tasks.find({"_id": {"$in": fetch}, "user_id": user_id}):
+            task["id"] = str(task.pop("_id"))
+            found[task["id"]] = task
+        tasks = [found[task_id] for task_id in dict.fromkeys(fetch_ids) if task_id in found]
+    
+    return {"results": results, "tasks": tasks}
+
+
+def _as_stored(value):
+    """``value`` as MongoDB returns it: datetimes in naive UTC, to the millisecond."""
+    if not isinstance(value, datetime):
+        return value
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+
+def _now() -> datetime:
+    """Current UTC time at the millisecond precision MongoDB stores."""
+    return _as_stored(datetime.utcnow())
+
+
+async def _record_time_entry(task: dict, entry: Optional[dict]) -> None:
+    """
+    Append the session ``entry`` closed on ``task`` to its time entry
+    bucket. Nothing to do if the transition did not close a session.
+
+    Buckets group up to ``TIME_ENTRY_BUCKET_SIZE`` entries of one task and
+    month, so tasks only carry aggregates and history reads are paginated.
+    Buckets written by ``migrate_time_entries`` are left to it: a re-run
+    replaces them.
+    """
+    if entry is None:
+        return
+    
+    db = get_database()
+    await db.time_entries.update_one(
         {
-            "$set": {
-                "is_running": True,
-                "current_session_start": now,
-                "updated_at": now
-            }
+            "task_id": task["id"],
+            "user_id": task["user_id"],
+            "month": entry["start_time"].strftime("%Y-%m"),
+            "count": {"$lt": TIME_ENTRY_BUCKET_SIZE},
+            "migrated": {"$ne": True}
+        },
+        {
+            "$push": {"entries": entry},
+            "$inc": {"count": 1, "total_seconds": entry["duration_seconds"]},
+            "$min": {"first_start": entry["start_time"]},
+            "$max": {"last_end": entry["end_time"]}
         },
-        return_document=True
+        upsert=True
     )
-    
-    if result:
-        result["id"] = str(result["_id"])
-        del result["_id"]
-    return result
+    await crud_analytics.record_session(task, entry)
 
 
-def pause_timer(task_id: str, user_id: str) -> Optional[dict]:
-    """Pause the timer for a task."""
-    db = get_database()
-    
-    # Get the task
-    task = db.tasks.find_one({"_id": ObjectId(task_id), "user_id": user_id})
-    if not task or not task.get("is_running", False):
-        return None
+def _buckets_for_page(buckets: List[dict], skip: int, limit: int) -> Tuple[List[ObjectId], int]:
+    """
+    The buckets holding entries ``skip`` to ``skip + limit`` of a task, newest
+    first, and how many entries the buckets left out before them hold.
+
+    ``buckets`` are sorted by ``first_start``, descending. A task's buckets
+    normally follow each other in time, but the bounds are only trusted as
+    far as they prove it: a bucket is skipped only if it starts after every
+    later bucket ends, and later buckets are added while one may end after
+    the selection's earliest start.
+    """
+    latest_end = [None] * (len(buckets) + 1)
+    for position in range(len(buckets) - 1, -1, -1):
+        latest_end[position] = max(
+            (end for end in (buckets[position]["last_end"], latest_end[position + 1]) if end is not None),
+            default=None
+        )
     
-    # Calculate elapsed time
-    now = datetime.utcnow()
-    start_time = task.get("current_session_start")
-    if not start_time:
-        return None
+    position = skipped = 0
+    while (
+        position < len(buckets)
+        and skipped + buckets[position]["count"] <= skip
+        and (latest_end[position + 1] is None or buckets[position]["first_start"] >= latest_end[position + 1])
+    ):
+        skipped += buckets[position]["count"]
+        position += 1
     
-    duration_seconds = int((now - start_time).total_seconds())
+    selected = []
+    covered = skipped
+    while position < len(buckets) and (
+        covered < skip + limit
+        or (latest_end[position] is not None and latest_end[position] > buckets[position - 1]["first_start"])
+    ):
+        selected.append(buckets[position]["_id"])
+        covered += buckets[position]["count"]
+        position += 1
+    return selected, skipped
+
+
+async def get_time_entries(task_id: str, user_id: str, skip: int = 0, limit: int = 50) -> Optional[List[dict]]:
+    """
+    Time entries of a task, newest first. Returns None if the task does not exist.
+
+    Only the buckets covering the page are unwound, found from their bounds
+    and counts.
+    """
+    db = get_database()
+    buckets = await db.time_entries.find(
+        {"task_id": task_id, "user_id": user_id},
+        {"count": 1, "first_start": 1, "last_end": 1}
+    ).sort("first_start", -1).to_list(length=None)
+    selected, skipped = _buckets_for_page(buckets, skip, limit)
     
-    # Create time entry
-    time_entry = {
-        "start_time": start_time,
+    entries = []
+    if selected:
+        cursor = db.time_entries.aggregate([
+            {"$match": {"_id": {"$in": selected}}},
+            {"$unwind": "$entries"},
+            {"$replaceRoot": {"newRoot": "$entries"}},
+            {"$sort": {"start_time": -1}},
+            {"$skip": skip - skipped},
+            {"$limit": limit},
+        ])
+        entries = await cursor.to_list(length=None)
+    if not buckets:
+        exists = await db.tasks.find_one({"_id": ObjectId(task_id), "user_id": user_id}, {"_id": 1})
+        if not exists:
+            return None
+    return entries
+
+
+def _close_session_pipeline(now: datetime, extra: Optional[dict] = None) -> List[dict]:
+    """
+    Update pipeline stopping the running session, if any, at ``now``.
+
+    The duration is computed by the server from the stored session start,
+    so the transition needs no prior read and cannot double count.
+    ``_close_session`` applies the same change to the previous document.
+    """
+    closing = {
+        "$and": [
+            {"$eq": ["$is_running", True]},
+            {"$eq": [{"$type": "$current_session_start"}, "date"]}
+        ]
+    }
+    elapsed_seconds = {
+        "$max": [
+            0,
+            {"$toInt": {"$floor": {"$divide": [{"$subtract": [now, "$current_session_start"]}, 1000]}}}
+        ]
+    }
+    has_session = {"$ne": ["$_session_seconds", None]}
+    new_entry = {
+        "start_time": "$current_session_start",
         "end_time": now,
-        "duration_seconds": duration_seconds
+        "duration_seconds": "$_session_seconds"
     }
-    
-    # Update task
-    current_total = task.get("total_time_spent", 0)
-    time_entries = task.get("time_entries", [])
-    time_entries.append(time_entry)
-    
-    result = db.tasks.find_one_and_update(
-        {"_id": ObjectId(task_id), "user_id": user_id},
+    return [
+        {"$set": {"_session_seconds": {"$cond": [closing, elapsed_seconds, None]}}},
         {
             "$set": {
+                "last_time_entry": {"$cond": [has_session, new_entry, "$last_time_entry"]},
+                "time_entry_count": {
+                    "$add": [{"$ifNull": ["$time_entry_count", 0]}, {"$cond": [has_session, 1, 0]}]
+                },
+                "total_time_spent": {
+                    "$add": [{"$ifNull": ["$total_time_spent", 0]}, {"$ifNull": ["$_session_seconds", 0]}]
+                },
                 "is_running": False,
                 "current_session_start": None,
-                "total_time_spent": current_total + duration_seconds,
-                "time_entries": time_entries,
-                "updated_at": now
+                "updated_at": now,
+                **(extra or {})
             }
         },
-        return_document=True
-    )
+        {"$unset": "_session_seconds"},
+    ]
+
+
+def _close_session(task: dict, now: datetime, extra: Optional[dict] = None) -> Tuple[dict, Optional[dict]]:
+    """
+    The task as ``_close_session_pipeline`` leaves it, from the document it
+    was applied to, and the session it closed, if any.
+    """
+    start = task.get("current_session_start")
+    closed = {
+        "is_running": False,
+        "current_session_start": None,
+        "updated_at": now,
+        **(extra or {})
+    }
+    entry = None
+    if task.get("is_running") is True and isinstance(start, datetime):
+        seconds = max(0, (now - start) // timedelta(seconds=1))
+        entry = {"start_time": start, "end_time": now, "duration_seconds": seconds}
+        closed.update(
+            last_time_entry=entry,
+            time_entry_count=(task.get("time_entry_count") or 0) + 1,
+            total_time_spent=(task.get("total_time_spent") or 0) + seconds
+        )
+    return {**task, **closed}, entry
+
+
+async def start_timer(task_id: str, user_id: str) -> Optional[dict]:
+    """Start the timer for a task. Starting a running timer is a no-op."""
+    db = get_database()
+    now = _now()
     
-    if result:
-        result["id"] = str(result["_id"])
-        del result["_id"]
+    async with crud_sync.sequence(user_id) as seq:
+        result = await db.tasks.find_one_and_update(
+            {"_id": ObjectId(task_id), "user_id": user_id, "is_running": {"$ne": True}},
+            {
+                "$set": {
+                    "is_running": True,
+                    "current_session_start": now,
+                    "updated_at": now,
+                    "sync_seq": seq
+                }
+            },
+            projection={"sync_seq": 0},
+            return_document=True
+        )
+    
+    if not result:
+        # Task missing or already running: return current state, if any
+        return await get_task(task_id, user_id)
+    
+    result["id"] = str(result["_id"])
+    del result["_id"]
+    await crud_stats.apply_change(user_id, {**result, "is_running": False}, result)
+    change_broker.publish(user_id, "task", "updated", [result["id"]])
     return result
 
 
-def complete_task(task_id: str, user_id: str) -> Optional[dict]:
-    """Complete a task and stop the timer if running."""
+async def pause_timer(task_id: str, user_id: str) -> Optional[dict]:
+    """Pause the timer for a task. Returns None if it was not running."""
     db = get_database()
+    now = _now()
     
-    # Get the task
-    task = db.tasks.find_one({"_id": ObjectId(task_id), "user_id": user_id})
-    if not task:
+    async with crud_sync.sequence(user_id) as seq:
+        before = await db.tasks.find_one_and_update(
+            {
+                "_id": ObjectId(task_id),
+                "user_id": user_id,
+                "is_running": True,
+                "current_session_start": {"$type": "date"}
+            },
+            _close_session_pipeline(now, {"sync_seq": seq}),
+            projection={"sync_seq": 0},
+            return_document=ReturnDocument.BEFORE
+        )
+    if not before:
         return None
     
-    now = datetime.utcnow()
-    update_data = {
-        "status": "done",
-        "completion_date": now,
-        "updated_at": now
-    }
+    before["id"] = str(before.pop("_id"))
+    result, entry = _close_session(before, now)
+    await asyncio.gather(
+        _record_time_entry(result, entry),
+        crud_stats.apply_change(user_id, before, result),
+    )
+    change_broker.publish(user_id, "task", "updated", [result["id"]])
+    return result
+
+
+async def complete_task(task_id: str, user_id: str) -> Optional[dict]:
+    """Complete a task and stop the timer if running."""
+    db = get_database()
+    now = _now()
+    completed = {"status": "done", "completion_date": now}
     
-    # If timer is running, stop it
-    if task.get("is_running", False):
-        start_time = task.get("current_session_start")
-        if start_time:
-            duration_seconds = int((now - start_time).total_seconds())
-            
-            time_entry = {
-                "start_time": start_time,
-                "end_time": now,
-                "duration_seconds": duration_seconds
-            }
-            
-            current_total = task.get("total_time_spent", 0)
-            time_entries = task.get("time_entries", [])
-            time_entries.append(time_entry)
-            
-            update_data.update({
-                "is_running": False,
-                "current_session_start": None,
-                "total_time_spent": current_total + duration_seconds,
-                "time_entries": time_entries
-            })
+    async with crud_sync.sequence(user_id) as seq:
+        before = await db.tasks.find_one_and_update(
+            {"_id": ObjectId(task_id), "user_id": user_id},
+            _close_session_pipeline(now, {**completed, "sync_seq": seq}),
+            projection={"sync_seq": 0},
+            return_document=ReturnDocument.BEFORE
+        )
+    if not before:
+        return None
     
-    result = db.tasks.find_one_and_update(
-        {"_id": ObjectId(task_id), "user_id": user_id},
-        {"$set": update_data},
-        return_document=True
+    before["id"] = str(before.pop("_id"))
+    result, entry = _close_session(before, now, completed)
+    await asyncio.gather(
+        _record_time_entry(result, entry),
+        crud_stats.apply_change(user_id, before, result),
     )
-    
-    if result:
-        result["id"] = str(result["_id"])
-        del result["_id"]
+    change_broker.publish(user_id, "task", "updated", [result["id"]])
     return result
@@ -0,0 +1,220 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.db.mongodb_utils import get_database
+from app.services.video_storage import remove_partial
+
+# Resumable video uploads, one document per upload in upload_sessions:
+#   {user_id, title, folder, filename, mime_type, size, chunk_size,
+#    chunk_count, received: [chunk index, ...], writers: [{token, at}, ...],
+#    status, note_id, slot, expires_at, created_at, updated_at}
+# status: open -> completing -> completed. Until completed the content is
+# in the sparse partial file of ``filename`` (see video_storage). Every
+# chunk pushes expires_at back; expired sessions are removed, with their
+# partial file, by ``expire_sessions``.
+# Active sessions hold one of the user's UPLOAD_SESSION_MAX_PER_USER slots;
+# the unique (user_id, slot) index enforces the cap under concurrent
+# creations. A completion stuck in completing longer than
+# UPLOAD_SESSION_COMPLETION_TIMEOUT_SECONDS (crashed process) can be retried.
+# writers lists the chunk writes in progress; a session is only completed
+# without any, so no chunk lands after the file was hashed. A writer older
+# than UPLOAD_SESSION_TTL_SECONDS is taken for a crashed process.
+
+
+class TooManySessions(Exception):
+    """The user already has ``UPLOAD_SESSION_MAX_PER_USER`` open uploads."""
+
+
+def _expires_at(now: datetime) -> datetime:
+    return now + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+
+
+def received_bytes(session: dict) -> int:
+    size, chunk_size = session["size"], session["chunk_size"]
+    return sum(min(chunk_size, size - index * chunk_size) for index in session["received"])
+
+
+def contiguous_bytes(session: dict) -> int:
+    """Bytes received without gaps from the start (the resume offset of sequential clients)."""
+    received = set(session["received"])
+    index = 0
+    while index in received:
+        index += 1
+    return min(session["size"], index * session["chunk_size"])
+
+
+def missing_chunks(session: dict) -> List[int]:
+    received = set(session["received"])
+    return [index for index in range(session["chunk_count"]) if index not in received]
+
+
+async def _free_slot(user_id: str, now: datetime) -> int:
+    """A slot no live session of the user holds. Raises TooManySessions."""
+    db = get_database()
+    # Expired sessions wait for the sweep, but their slots are free now
+    await db.upload_sessions.update_many(
+        {"user_id": user_id, "slot": {"$exists": True}, "expires_at": {"$lte": now}},
+        {"$unset": {"slot": ""}},
+    )
+    cursor = db.upload_sessions.find({"user_id": user_id, "slot": {"$exists": True}}, {"slot": 1})
+    taken = {session["slot"] async for session in cursor}
+    for slot in range(settings.UPLOAD_SESSION_MAX_PER_USER):
+        if slot not in taken:
+            return slot
+    raise TooManySessions()
+
+
+async def create_session(user_id: str, title: str, folder: str, filename: str, mime_type: str, size: int) -> dict:
+    db = get_database()
+    now = datetime.utcnow()
+    chunk_size = settings.UPLOAD_SESSION_CHUNK_BYTES
+    session = {
+        "user_id": user_id,
+        "title": title,
+        "folder": folder,
+        "filename": filename,
+        "mime_type": mime_type,
+        "size": size,
+        "chunk_size": chunk_size,
+        "chunk_count": -(-size // chunk_size),
+        "received": [],
+        "writers": [],
+        "status": "open",
+        "note_id": None,
+        "expires_at": _expires_at(now),
+        "created_at": now,
+        "updated_at": now,
+    }
+    while True:
+        session["slot"] = await _free_slot(user_id, now)
+        try:
+            result = await db.upload_sessions.insert_one(session)
+            break
+        except DuplicateKeyError:
+            # A concurrent creation took the slot
+            session.pop("_id", None)
+    session["_id"] = result.inserted_id
+    return session
+
+
+async def get_session(session_id: str, user_id: str) -> Optional[dict]:
+    """A session of the user, unless it does not exist or expired."""
+    if not ObjectId.is_valid(session_id):
+        return None
+    db = get_database()
+    return await db.upload_sessions.find_one(
+        {"_id": ObjectId(session_id), "user_id": user_id, "expires_at": {"$gt": datetime.utcnow()}}
+    )
+
+
+async def begin_write(session: dict) -> Optional[str]:
+    """
+    Register a chunk write and extend the session. Returns the writer token
+    for ``end_write``, or None if the session is no longer open.
+    """
+    db = get_database()
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    claimed = await db.upload_sessions.find_one_and_update(
+        {"_id": session["_id"], "status": "open"},
+        {
+            "$push": {"writers": {"token": token, "at": now}},
+            "$set": {"expires_at": _expires_at(now), "updated_at": now},
+        },
+        projection={"_id": 1},
+    )
+    return token if claimed else None
+
+
+async def end_write(session: dict, token: str, index: Optional[int] = None) -> Optional[dict]:
+    """
+    Unregister the writer ``token``, recording chunk ``index`` if it was
+    written. None if the session is no longer open.
+    """
+    db = get_database()
+    now = datetime.utcnow()
+    update = {"$pull": {"writers": {"token": token}}, "$set": {"expires_at": _expires_at(now), "updated_at": now}}
+    if index is not None:
+        update["$addToSet"] = {"received": index}
+    return await db.upload_sessions.find_one_and_update(
+        {"_id": session["_id"], "status": "open"},
+        update,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def is_stale_completion(session: dict) -> bool:
+    """Whether a completing session was abandoned (its process crashed)."""
+    timeout = timedelta(seconds=settings.UPLOAD_SESSION_COMPLETION_TIMEOUT_SECONDS)
+    return session["status"] == "completing" and session["updated_at"] < datetime.utcnow() - timeout
+
+
+async def begin_completion(session: dict) -> Optional[dict]:
+    """
+    Move an open session with no chunk being written (or an abandoned
+    completing one) to completing. Returns the claimed session, or None if
+    another request got there first or chunks are still being written.
+    """
+    db = get_database()
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=settings.UPLOAD_SESSION_COMPLETION_TIMEOUT_SECONDS)
+    abandoned = now - timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+    idle = {"status": "open", "writers": {"$not": {"$elemMatch": {"at": {"$gt": abandoned}}}}}
+    return await db.upload_sessions.find_one_and_update(
+        {
+            "_id": session["_id"],
+            "$or": [idle, {"status": "completing", "updated_at": {"$lt": stale}}],
+        },
+        # Not swept while the file is being hashed and moved
+        {"$set": {"status": "completing", "expires_at": _expires_at(now), "updated_at": now}},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _completing(session: dict) -> dict:
+    """Filter matching the session only while the claim of ``begin_completion`` holds."""
+    return {"_id": session["_id"], "status": "completing", "updated_at": session["updated_at"]}
+
+
+async def abort_completion(session: dict) -> None:
+    """Reopen a session whose completion failed, so it can be retried."""
+    db = get_database()
+    await db.upload_sessions.update_one(
+        _completing(session),
+        {"$set": {"status": "open", "updated_at": datetime.utcnow()}},
+    )
+
+
+async def complete_session(session: dict, note_id: str) -> None:
+    """Keep the completed session until it expires, so repeated completions return the note."""
+    db = get_database()
+    now = datetime.utcnow()
+    await db.upload_sessions.update_one(
+        _completing(session),
+        {
+            "$set": {"status": "completed", "note_id": note_id, "expires_at": _expires_at(now), "updated_at": now},
+            "$unset": {"slot": ""},
+        },
+    )
+
+
+async def delete_session(session: dict) -> None:
+    db = get_database()
+    await db.upload_sessions.delete_one({"_id": session["_id"]})
+    if session["status"] != "completed":
+        await remove_partial(settings.UPLOAD_DIR, session["filename"])
+
+
+async def expire_sessions() -> int:
+    """Remove expired sessions and their partial files. Returns how many."""
+    db = get_database()
+    count = 0
+    cursor = db.upload_sessions.find({"expires_at": {"$lte": datetime.utcnow()}}, {"filename": 1, "status": 1})
+    async for session in cursor:
+        await delete_session(session)
+        count += 1
+    return count
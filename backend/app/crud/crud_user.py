@@ -1,53 +1,64 @@
 from typing import Optional
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from app.db.mongodb_utils import get_database
-from app.core.security import get_password_hash, verify_password
+from app.core import auth_cache
+from app.core.security import hash_password, verify_and_update_password
 from app.models.user import UserCreate
 
 
-def create_user(user: UserCreate) -> dict:
+async def create_user(user: UserCreate) -> dict:
     """Create a new user."""
     db = get_database()
     
-    # Check if user already exists
-    existing_user = db.users.find_one({"email": user.email})
-    if existing_user:
-        raise ValueError("User with this email already exists")
-    
     user_dict = user.model_dump()
-    user_dict["password"] = get_password_hash(user.password)
+    user_dict["password"] = await hash_password(user.password)
     user_dict["created_at"] = datetime.utcnow()
     
-    result = db.users.insert_one(user_dict)
+    # The unique email index rejects duplicates atomically
+    try:
+        result = await db.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        raise ValueError("User with this email already exists")
     user_dict["_id"] = str(result.inserted_id)
     del user_dict["password"]  # Don't return password
     return user_dict
 
 
-def get_user_by_email(email: str) -> Optional[dict]:
+async def get_user_by_email(email: str) -> Optional[dict]:
     """Get a user by email."""
     db = get_database()
-    user = db.users.find_one({"email": email})
+    user = await db.users.find_one({"email": email})
     if user:
         user["_id"] = str(user["_id"])
     return user
 
 
-def get_user_by_id(user_id: str) -> Optional[dict]:
+async def get_user_by_id(user_id: str) -> Optional[dict]:
     """Get a user by ID."""
     db = get_database()
-    user = db.users.find_one({"_id": ObjectId(user_id)})
+    user = await db.users.find_one({"_id": ObjectId(user_id)})
     if user:
         user["_id"] = str(user["_id"])
     return user
 
 
-def authenticate_user(email: str, password: str) -> Optional[dict]:
-    """Authenticate a user."""
-    user = get_user_by_email(email)
+async def authenticate_user(email: str, password: str) -> Optional[dict]:
+    """
+    Authenticate a user.
+
+    Hashes made with outdated bcrypt parameters are replaced on success.
+    Raises PasswordHashingBusy when the hashing pool is saturated.
+    """
+    user = await get_user_by_email(email)
     if not user:
         return None
-    if not verify_password(password, user["password"]):
+    valid, new_hash = await verify_and_update_password(password, user["password"])
+    if not valid:
         return None
+    if new_hash:
+        db = get_database()
+        await db.users.update_one({"_id": ObjectId(user["_id"])}, {"$set": {"password": new_hash}})
+        auth_cache.invalidate_user(user["_id"])
     return user
@@ -0,0 +1,183 @@
+"""
+Declarative index registry.
+
+Every query the CRUD layer issues must be served by one of the indexes
+declared here. ``ensure_indexes()`` runs at startup; the module can also be
+run as a script to compare the declared indexes against a live database:
+
+    python -m app.db.indexes            # report drift, exit 1 if any
+    python -m app.db.indexes --apply    # create missing indexes
+"""
+import argparse
+import asyncio
+import sys
+from typing import Dict, List
+from pymongo import ASCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from app.core.config import settings
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "tasks": [
+        IndexModel([("user_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)], name="user_created_id"),
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)], name="user_status"),
+        IndexModel([("user_id", ASCENDING), ("due_date", ASCENDING)], name="user_due_date"),
+        IndexModel([("user_id", ASCENDING), ("sync_seq", ASCENDING)], name="user_sync_seq"),
+    ],
+    "time_entries": [
+        IndexModel([("task_id", ASCENDING), ("month", ASCENDING), ("count", ASCENDING)], name="task_month_count"),
+        IndexModel([("user_id", ASCENDING), ("first_start", ASCENDING)], name="user_first_start"),
+    ],
+    "time_stats_daily": [
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], name="user_day_unique", unique=True),
+    ],
+    "tombstones": [
+        IndexModel([("user_id", ASCENDING), ("sync_seq", ASCENDING)], name="user_sync_seq"),
+        IndexModel(
+            [("deleted_at", ASCENDING)],
+            name="deleted_at_ttl",
+            expireAfterSeconds=settings.SYNC_TOMBSTONE_TTL_DAYS * 86400,
+        ),
+    ],
+    "rate_limits": [
+        # Shared admission control buckets (ADMISSION_STORE=mongo)
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "drive_upload_jobs": [
+        IndexModel([("note_id", ASCENDING)], name="note_id_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("run_at", ASCENDING)], name="status_run_at"),
+    ],
+    "upload_sessions": [
+        # One per active session: caps open uploads per user atomically
+        IndexModel(
+            [("user_id", ASCENDING), ("slot", ASCENDING)],
+            name="user_slot_unique",
+            unique=True,
+            partialFilterExpression={"slot": {"$exists": True}},
+        ),
+        # Not a TTL index: expired sessions also have a partial file to remove
+        IndexModel([("expires_at", ASCENDING)], name="expires_at"),
+    ],
+    "notes": [
+        IndexModel([("user_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)], name="user_created_id"),
+        IndexModel([("user_id", ASCENDING), ("sync_seq", ASCENDING)], name="user_sync_seq"),
+        # Full-text search, scoped per user. Title matches rank higher.
+        IndexModel(
+            [("user_id", ASCENDING), ("title", TEXT), ("content", TEXT)],
+            name="user_text",
+            weights={"title": 10, "content": 1},
+            default_language=settings.NOTES_SEARCH_LANGUAGE,
+        ),
+    ],
+}
+
+# Options that change index behaviour and therefore count as drift.
+_COMPARED_OPTIONS = (
+    "unique",
+    "sparse",
+    "expireAfterSeconds",
+    "partialFilterExpression",
+    "weights",
+    "default_language",
+)
+
+
+def _normalize(spec: dict) -> dict:
+    """Reduce an index spec to the parts that matter for comparison."""
+    key = []
+    for field, direction in spec["key"].items():
+        if direction == TEXT:
+            # The server stores every text field as a single _fts/_ftsx pair;
+            # the fields themselves are compared through ``weights``.
+            field = "_fts"
+        if (field, direction) not in key and field != "_ftsx":
+            key.append((field, direction))
+    normalized = {"key": key}
+    for option in _COMPARED_OPTIONS:
+        if option in spec:
+            normalized[option] = spec[option]
+    return normalized
+
+
+async def diff_indexes(db) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Compare declared indexes with the live ones.
+
+    Returns a mapping of collection name to ``missing``, ``changed`` and
+    ``undeclared`` index names. Collections without drift are omitted.
+    """
+    report = {}
+    for collection, models in INDEXES.items():
+        live = {}
+        async for spec in db[collection].list_indexes():
+            if spec["name"] != "_id_":
+                live[spec["name"]] = _normalize(spec)
+
+        missing, changed = [], []
+        for model in models:
+            declared = _normalize(model.document)
+            name = model.document["name"]
+            if name not in live:
+                missing.append(name)
+            elif live[name] != declared:
+                changed.append(name)
+
+        declared_names = {model.document["name"] for model in models}
+        undeclared = sorted(set(live) - declared_names)
+
+        if missing or changed or undeclared:
+            report[collection] = {
+                "missing": missing,
+                "changed": changed,
+                "undeclared": undeclared,
+            }
+    return report
+
+
+async def ensure_indexes(db) -> None:
+    """Create every declared index that does not exist yet."""
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except OperationFailure as e:
+            # An existing index with the same name but different options, or
+            # data violating a unique constraint. Keep serving and let the
+            # report surface the problem.
+            print(f"Warning: Could not ensure indexes on '{collection}': {e}")
+
+
+async def _run(apply: bool) -> int:
+    from app.db.mongodb_utils import connect_to_mongo, close_mongo_connection, get_database
+
+    connect_to_mongo()
+    try:
+        db = get_database()
+        if apply:
+            await ensure_indexes(db)
+        report = await diff_indexes(db)
+    finally:
+        close_mongo_connection()
+
+    if not report:
+        print("Indexes are up to date.")
+        return 0
+
+    for collection, drift in report.items():
+        print(f"{collection}:")
+        for kind in ("missing", "changed", "undeclared"):
+            for name in drift[kind]:
+                print(f"  {kind:<10} {name}")
+    return 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check declared MongoDB indexes against the live database.")
+    parser.add_argument("--apply", action="store_true", help="create missing indexes before reporting")
+    args = parser.parse_args()
+    return asyncio.run(_run(args.apply))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,124 @@
-from pymongo import MongoClient
+import asyncio
+import time
+from collections import Counter
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 from app.core.config import settings
 
 client = None
 database = None
 
 
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Tracks open and checked out connections across all pools."""
+
+    def __init__(self):
+        self.open = Counter()
+        self.in_use = Counter()
+
+    def snapshot(self) -> dict:
+        open_connections = sum(self.open.values())
+        in_use = sum(self.in_use.values())
+        return {
+            "open": open_connections,
+            "in_use": in_use,
+            "max_size": settings.MONGODB_MAX_POOL_SIZE,
+            "min_size": settings.MONGODB_MIN_POOL_SIZE,
+            "utilisation": round(in_use / settings.MONGODB_MAX_POOL_SIZE, 3),
+        }
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.in_use[event.address] = 0
+
+    def pool_closed(self, event):
+        self.open.pop(event.address, None)
+        self.in_use.pop(event.address, None)
+
+    def connection_created(self, event):
+        self.open[event.address] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.open[event.address] = max(self.open[event.address] - 1, 0)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        pass
+
+    def connection_checked_out(self, event):
+        self.in_use[event.address] += 1
+
+    def connection_checked_in(self, event):
+        self.in_use[event.address] = max(self.in_use[event.address] - 1, 0)
+
+
+pool_stats = PoolStats()
+pool_warm = False
+
+
 def connect_to_mongo():
     """Connect to MongoDB."""
     global client, database
-    client = MongoClient(settings.MONGODB_URL)
+    options = {
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGODB_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGODB_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGODB_SOCKET_TIMEOUT_MS,
+        "event_listeners": [pool_stats],
+    }
+    if settings.MONGODB_COMPRESSORS:
+        options["compressors"] = settings.MONGODB_COMPRESSORS
+    client = AsyncIOMotorClient(settings.MONGODB_URL, **options)
     database = client[settings.DATABASE_NAME]
     print(f"Connected to MongoDB database: {settings.DATABASE_NAME}")
 
 
 def close_mongo_connection():
     """Close MongoDB connection."""
-    global client
+    global client, pool_warm
     if client:
         client.close()
+        pool_warm = False
         print("Closed MongoDB connection")
 
 
 def get_database():
-    """Get database instance."""
+    """Get database instance (Motor, all operations must be awaited)."""
     return database
+
+
+async def ping() -> float:
+    """Ping the server and return the round trip latency in milliseconds."""
+    started = time.perf_counter()
+    await client.admin.command("ping")
+    return (time.perf_counter() - started) * 1000
+
+
+async def warm_up_pool() -> bool:
+    """
+    Open the minimum pool before serving traffic.
+
+    Concurrent pings force the driver to establish one connection each,
+    instead of waiting for the background pool maintenance to catch up.
+    """
+    global pool_warm
+    try:
+        await asyncio.gather(*(ping() for _ in range(max(settings.MONGODB_MIN_POOL_SIZE, 1))))
+    except Exception as e:
+        print(f"Warning: Could not warm up MongoDB connection pool: {e}")
+        return False
+    pool_warm = True
+    return True
@@ -0,0 +1,62 @@
+"""
+Stamp tasks, notes and tombstones written before sync sequence numbers
+existed, so delta sync (``GET /api/v1/sync``) returns them.
+
+    python -m app.jobs.backfill_sync_seq
+
+Only documents without ``sync_seq`` are touched, so the job can be re-run
+safely while the API is serving.
+"""
+import argparse
+import asyncio
+import sys
+from pymongo import UpdateOne
+from app.crud import crud_sync
+
+COLLECTIONS = ("tasks", "notes", "tombstones")
+BATCH_SIZE = 1000
+
+
+async def backfill(db) -> int:
+    """Stamp every unstamped document. Returns how many were stamped."""
+    count = 0
+    for collection in COLLECTIONS:
+        missing = {"sync_seq": {"$exists": False}}
+        for user_id in await db[collection].distinct("user_id", missing):
+            while True:
+                cursor = db[collection].find({"user_id": user_id, **missing}, {"_id": 1}).limit(BATCH_SIZE)
+                ids = [doc["_id"] async for doc in cursor]
+                if not ids:
+                    break
+                async with crud_sync.sequence(user_id, len(ids)) as first:
+                    await db[collection].bulk_write(
+                        [
+                            UpdateOne({"_id": _id, **missing}, {"$set": {"sync_seq": first + offset}})
+                            for offset, _id in enumerate(ids)
+                        ],
+                        ordered=False,
+                    )
+                count += len(ids)
+    return count
+
+
+async def _run() -> int:
+    from app.db.mongodb_utils import connect_to_mongo, close_mongo_connection, get_database
+
+    connect_to_mongo()
+    try:
+        count = await backfill(get_database())
+    finally:
+        close_mongo_connection()
+    print(f"Stamped {count} document(s) with a sync sequence number.")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Stamp documents written before sync sequence numbers.")
+    parser.parse_args()
+    return asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Rebuild the daily time rollups (``time_stats_daily``) from the time entry
+buckets.
+
+    python -m app.jobs.backfill_time_stats [--user USER_ID]
+
+Sessions are attributed with the task's current priority, quadrant and
+tags. Each user's rollups are replaced as a whole, so increments recorded
+for that user while the job runs may be lost; run it off-peak.
+"""
+import argparse
+import asyncio
+import sys
+from collections import defaultdict
+from typing import Optional
+from pymongo import ReplaceOne
+from app.crud.crud_analytics import session_increments
+
+
+def _pipeline(user_id: str) -> list:
+    """Closed sessions of a user joined with the fields they are grouped by."""
+    return [
+        {"$match": {"user_id": user_id}},
+        {"$unwind": "$entries"},
+        {"$match": {"entries.end_time": {"$type": "date"}}},
+        {
+            "$lookup": {
+                "from": "tasks",
+                "let": {"task_id": {"$toObjectId": "$task_id"}},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$_id", "$$task_id"]}}},
+                    {"$project": {"priority": 1, "eisenhower_quadrant": 1, "tags": 1}},
+                ],
+                "as": "task",
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "entry": "$entries",
+                "task": {"$ifNull": [{"$first": "$task"}, {}]},
+            }
+        },
+    ]
+
+
+async def backfill_user(db, user_id: str) -> int:
+    """Recompute one user's daily rollups. Returns the number of days written."""
+    days = defaultdict(lambda: defaultdict(int))
+    async for row in db.time_entries.aggregate(_pipeline(user_id), allowDiskUse=True):
+        task = dict(row["task"], user_id=user_id)
+        for day, inc in session_increments(task, row["entry"]).items():
+            for field, value in inc.items():
+                days[day][field] += value
+
+    operations = []
+    for day, counters in days.items():
+        doc = {"user_id": user_id, "day": day}
+        for field, value in counters.items():
+            if "." in field:
+                group, key = field.split(".", 1)
+                doc.setdefault(group, {})[key] = value
+            else:
+                doc[field] = value
+        operations.append(ReplaceOne({"user_id": user_id, "day": day}, doc, upsert=True))
+
+    await db.time_stats_daily.delete_many({"user_id": user_id, "day": {"$nin": list(days)}})
+    if operations:
+        await db.time_stats_daily.bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+async def backfill(db, user_id: Optional[str] = None) -> int:
+    user_ids = [user_id] if user_id else await db.time_entries.distinct("user_id")
+    written = 0
+    for current in user_ids:
+        written += await backfill_user(db, current)
+    return written
+
+
+async def _run(user_id: Optional[str]) -> int:
+    from app.db.mongodb_utils import connect_to_mongo, close_mongo_connection, get_database
+
+    connect_to_mongo()
+    try:
+        written = await backfill(get_database(), user_id)
+    finally:
+        close_mongo_connection()
+    print(f"Wrote {written} daily rollup(s).")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rebuild daily time rollups from time entries.")
+    parser.add_argument("--user", help="only rebuild this user id")
+    args = parser.parse_args()
+    return asyncio.run(_run(args.user))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
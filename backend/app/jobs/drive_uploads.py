@@ -0,0 +1,182 @@
+"""
+Background uploads of video notes to Google Drive.
+
+Jobs are queued in MongoDB (``drive_upload_jobs``) when a video note is
+created, and run by ``DriveUploadWorker`` tasks: inside the API process
+when ``DRIVE_JOBS_IN_PROCESS`` is set, or as separate processes:
+
+    python -m app.jobs.drive_uploads [--concurrency N] [--once]
+
+Failed uploads are retried with exponential backoff. Once a job is done
+the note's ``video_url`` points to Drive; until then it points to the
+local copy. A video whose note was deleted during the upload, or whose job
+was taken over by another worker, is deleted from Drive again. ``DRIVE_BACKEND=fake`` uploads to a local directory instead.
+
+Target folders follow ``DRIVE_FOLDER_LAYOUT`` and are resolved through the
+folder cache (``app.services.drive_folders``).
+"""
+import argparse
+import asyncio
+import socket
+import sys
+import time
+import uuid
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.crud import crud_drive_jobs, crud_note
+from app.models.note import NoteUpdate
+from app.services.drive_folders import FolderNotFound, folder_cache, folder_path
+from app.services.fake_drive import FakeDriveService
+from app.services.google_drive import google_drive_service
+
+# Seconds between progress writes while an upload runs
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+_fake_drive: Optional[FakeDriveService] = None
+
+
+def drive_backend():
+    """The configured upload backend: Google Drive, or the local fake."""
+    global _fake_drive
+    if settings.DRIVE_BACKEND == "fake":
+        if _fake_drive is None:
+            _fake_drive = FakeDriveService(settings.FAKE_DRIVE_DIR)
+        return _fake_drive
+    return google_drive_service
+
+
+# Wakes in-process workers as soon as a job is queued
+job_available = asyncio.Event()
+
+
+class DriveUploadWorker:
+    """Claims and runs upload jobs one at a time."""
+
+    def __init__(self, backend=None, worker_id: Optional[str] = None):
+        self.backend = backend
+        self.worker_id = worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:6]}"
+
+    async def run_once(self) -> bool:
+        """Run the next due job, if any. Returns whether one was run."""
+        job = await crud_drive_jobs.claim_next(self.worker_id)
+        if job is None:
+            return False
+        await self._process(job)
+        return True
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                if await self.run_once():
+                    continue
+            except Exception as e:
+                print(f"Warning: Drive upload worker error: {e}")
+            job_available.clear()
+            try:
+                await asyncio.wait_for(job_available.wait(), timeout=settings.DRIVE_JOBS_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _process(self, job: dict) -> None:
+        note = await crud_note.get_note(job["note_id"], job["user_id"])
+        if note is None:
+            await crud_drive_jobs.cancel(job, "Note deleted")
+            return
+
+        backend = self.backend or drive_backend()
+        uploaded = {"bytes": job.get("bytes_uploaded", 0)}
+
+        def on_progress(bytes_uploaded: int) -> None:
+            # Called from the upload thread; read by the loop below
+            uploaded["bytes"] = bytes_uploaded
+
+        path = folder_path(job["user_id"], note)
+
+        async def upload() -> str:
+            try:
+                folder_id = await folder_cache.resolve(backend, path)
+                return await run_in_threadpool(
+                    backend.upload_file, job["path"], job["filename"], job["mime_type"], on_progress, folder_id
+                )
+            except FolderNotFound:
+                # Stale cached id (folder deleted in Drive): resolve again once
+                await folder_cache.invalidate(path)
+                folder_id = await folder_cache.resolve(backend, path)
+                return await run_in_threadpool(
+                    backend.upload_file, job["path"], job["filename"], job["mime_type"], on_progress, folder_id
+                )
+
+        upload = asyncio.ensure_future(upload())
+        reported = uploaded["bytes"]
+        reported_at = time.monotonic()
+        while True:
+            done, _ = await asyncio.wait({upload}, timeout=PROGRESS_INTERVAL_SECONDS)
+            if done:
+                break
+            # Also renews the lease while the upload makes no visible progress
+            if uploaded["bytes"] != reported or time.monotonic() - reported_at >= settings.DRIVE_JOBS_LEASE_SECONDS / 3:
+                reported, reported_at = uploaded["bytes"], time.monotonic()
+                # A lost claim only matters once the upload ends: the thread cannot be stopped
+                await crud_drive_jobs.report_progress(job, reported)
+
+        try:
+            drive_url = upload.result()
+        except Exception as e:
+            status = await crud_drive_jobs.fail(job, f"{type(e).__name__}: {e}")
+            if status is not None:
+                print(f"Warning: Drive upload of note {job['note_id']} failed (attempt {job['attempts']}, now {status}): {e}")
+            return
+
+        # Another worker took the job over (lease expired): its upload wins
+        if not await crud_drive_jobs.report_progress(job, job["size"]):
+            await self._discard(backend, drive_url)
+            return
+
+        # The note goes first: a job marked done always has its note pointing to Drive
+        note = await crud_note.update_note(job["note_id"], NoteUpdate(video_url=drive_url), job["user_id"])
+        if note is None:
+            await crud_drive_jobs.cancel(job, "Note deleted")
+            await self._discard(backend, drive_url)
+            return
+        await crud_drive_jobs.complete(job, drive_url)
+
+    async def _discard(self, backend, drive_url: str) -> None:
+        """Delete an uploaded video nothing will point to."""
+        if not await run_in_threadpool(backend.delete_video, drive_url):
+            print(f"Warning: Could not delete orphaned Drive video {drive_url}")
+
+
+def start_workers(concurrency: int) -> list:
+    """Start in-process workers on the running loop."""
+    return [asyncio.create_task(DriveUploadWorker().run_forever()) for _ in range(concurrency)]
+
+
+async def _run(concurrency: int, once: bool) -> int:
+    from app.db.mongodb_utils import connect_to_mongo, close_mongo_connection
+
+    connect_to_mongo()
+    try:
+        if once:
+            worker = DriveUploadWorker()
+            count = 0
+            while await worker.run_once():
+                count += 1
+            print(f"Ran {count} upload job(s).")
+        else:
+            await asyncio.gather(*start_workers(concurrency))
+    finally:
+        close_mongo_connection()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run Google Drive upload jobs.")
+    parser.add_argument("--concurrency", type=int, default=settings.DRIVE_JOBS_CONCURRENCY)
+    parser.add_argument("--once", action="store_true", help="run the due jobs, then exit")
+    args = parser.parse_args()
+    return asyncio.run(_run(args.concurrency, args.once))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
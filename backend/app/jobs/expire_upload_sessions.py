@@ -0,0 +1,43 @@
+"""
+Remove expired resumable video uploads and their partial files.
+
+    python -m app.jobs.expire_upload_sessions
+
+The API process also runs this every ``UPLOAD_SESSION_SWEEP_SECONDS``.
+"""
+import argparse
+import asyncio
+import sys
+from app.core.config import settings
+from app.crud import crud_upload_sessions
+
+
+async def sweep_forever() -> None:
+    while True:
+        try:
+            await crud_upload_sessions.expire_sessions()
+        except Exception as e:
+            print(f"Warning: Upload session sweep failed: {e}")
+        await asyncio.sleep(settings.UPLOAD_SESSION_SWEEP_SECONDS)
+
+
+async def _run() -> int:
+    from app.db.mongodb_utils import connect_to_mongo, close_mongo_connection
+
+    connect_to_mongo()
+    try:
+        count = await crud_upload_sessions.expire_sessions()
+    finally:
+        close_mongo_connection()
+    print(f"Removed {count} expired upload session(s).")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Remove expired resumable video uploads.")
+    parser.parse_args()
+    return asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
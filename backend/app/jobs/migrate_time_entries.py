@@ -0,0 +1,85 @@
+"""
+Move time entries embedded in task documents into the bucketed
+``time_entries`` collection.
+
+    python -m app.jobs.migrate_time_entries
+
+Tasks are migrated one at a time and the embedded array is only removed
+after its buckets are written, so the job can be re-run after a failure.
+Buckets written here are marked ``migrated`` and never receive live
+entries, so a re-run can replace them without losing sessions recorded
+meanwhile.
+"""
+import asyncio
+import sys
+from itertools import groupby
+from app.crud.crud_task import TIME_ENTRY_BUCKET_SIZE
+
+
+def build_buckets(task_id: str, user_id: str, entries: list) -> list:
+    """Group entries by month of their start into buckets of bounded size."""
+    buckets = []
+    ordered = sorted(entries, key=lambda entry: entry["start_time"])
+    for month, month_entries in groupby(ordered, key=lambda entry: entry["start_time"].strftime("%Y-%m")):
+        month_entries = list(month_entries)
+        for offset in range(0, len(month_entries), TIME_ENTRY_BUCKET_SIZE):
+            chunk = month_entries[offset:offset + TIME_ENTRY_BUCKET_SIZE]
+            buckets.append({
+                "task_id": task_id,
+                "user_id": user_id,
+                "month": month,
+                "count": len(chunk),
+                "total_seconds": sum(entry.get("duration_seconds") or 0 for entry in chunk),
+                "first_start": chunk[0]["start_time"],
+                "last_end": max((entry.get("end_time") or entry["start_time"]) for entry in chunk),
+                "entries": chunk,
+                "migrated": True,
+            })
+    return buckets
+
+
+async def migrate(db) -> int:
+    """Migrate every task that still embeds time entries. Returns the task count."""
+    migrated = 0
+    cursor = db.tasks.find(
+        {"time_entries": {"$exists": True}},
+        {"user_id": 1, "time_entries": 1}
+    )
+    async for task in cursor:
+        task_id = str(task["_id"])
+        entries = [entry for entry in task.get("time_entries") or [] if entry.get("start_time")]
+
+        # Buckets left behind by an interrupted run of this task
+        await db.time_entries.delete_many({"task_id": task_id, "migrated": True})
+        buckets = build_buckets(task_id, task["user_id"], entries)
+        if buckets:
+            await db.time_entries.insert_many(buckets)
+
+        await db.tasks.update_one(
+            {"_id": task["_id"]},
+            {
+                "$unset": {"time_entries": ""},
+                "$set": {
+                    "time_entry_count": len(entries),
+                    "last_time_entry": max(entries, key=lambda entry: entry["start_time"]) if entries else None,
+                },
+            }
+        )
+        migrated += 1
+    return migrated
+
+
+async def _run() -> int:
+    from app.db.mongodb_utils import connect_to_mongo, close_mongo_connection, get_database
+
+    connect_to_mongo()
+    try:
+        count = await migrate(get_database())
+    finally:
+        close_mongo_connection()
+    print(f"Migrated time entries of {count} task(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_run()))
@@ -0,0 +1,44 @@
+"""
+Recompute the per-user dashboard counters (``task_stats``) from scratch.
+
+    python -m app.jobs.reconcile_task_stats [--user USER_ID]
+
+The counters are maintained incrementally by the task write paths; this
+job repairs any drift (e.g. after manual data fixes or a crashed request).
+"""
+import argparse
+import asyncio
+import sys
+from typing import Optional
+from app.crud import crud_stats
+
+
+async def reconcile(db, user_id: Optional[str] = None) -> int:
+    """Recompute the counters of one or all users. Returns the user count."""
+    user_ids = [user_id] if user_id else await db.tasks.distinct("user_id")
+    for current in user_ids:
+        await crud_stats.recompute(current)
+    return len(user_ids)
+
+
+async def _run(user_id: Optional[str]) -> int:
+    from app.db.mongodb_utils import connect_to_mongo, close_mongo_connection, get_database
+
+    connect_to_mongo()
+    try:
+        count = await reconcile(get_database(), user_id)
+    finally:
+        close_mongo_connection()
+    print(f"Reconciled task stats of {count} user(s).")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Recompute per-user task counters.")
+    parser.add_argument("--user", help="only reconcile this user id")
+    args = parser.parse_args()
+    return asyncio.run(_run(args.user))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,29 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, status
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from app.core import admission, auth_cache
+from app.core.admission import AdmissionControlMiddleware
 from app.core.config import settings
-from app.db.mongodb_utils import connect_to_mongo, close_mongo_connection
-from app.api.v1 import auth, tasks, notes
+from app.core.security import hashing_stats
+from app.core.etag import ETAG_HEADER
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.db import mongodb_utils
+from app.db.mongodb_utils import connect_to_mongo, close_mongo_connection, get_database
+from app.jobs.drive_uploads import start_workers
+from app.jobs.expire_upload_sessions import sweep_forever
+from app.services.drive_folders import folder_cache
+from app.services.events import change_broker, watch_changes
+from app.db.indexes import ensure_indexes
+from app.api.v1 import auth, tasks, notes, search, analytics, sync, events
 import os
 
-app = FastAPI(title=settings.PROJECT_NAME)
+app = FastAPI(title=settings.PROJECT_NAME, default_response_class=ORJSONResponse)
+
+# Admission control: registered first so CORS wraps it and rejections
+# stay readable by the browser
+app.add_middleware(AdmissionControlMiddleware)
 
 # CORS configuration
 app.add_middleware(
@@ -15,6 +32,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER],
 )
 
 # Create uploads directory if it doesn't exist
@@ -23,16 +41,54 @@ os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 # Mount static files for uploaded videos
 app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
+# Feeds the change broker when EVENTS_SOURCE=change_stream
+change_stream_task = None
+
+# Drive upload workers when DRIVE_JOBS_IN_PROCESS is set
+drive_upload_workers = []
+
+# Removes expired resumable uploads
+upload_session_sweep = None
+
+# Warm-up started by /ready while the pool is cold
+readiness_warm_up = None
+
+
+async def warm_up() -> bool:
+    """Open the minimum connection pool and ensure indexes once it is up."""
+    if not await mongodb_utils.warm_up_pool():
+        return False
+    await ensure_indexes(get_database())
+    return True
+
+
+def _warm_up_done(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Warning: Warm-up failed: {task.exception()}")
+
 
 @app.on_event("startup")
 async def startup_event():
-    """Connect to MongoDB on startup."""
+    """Connect to MongoDB, warm up the pool and ensure indexes on startup."""
+    global change_stream_task, upload_session_sweep
     connect_to_mongo()
+    await warm_up()
+    if settings.EVENTS_SOURCE == "change_stream":
+        change_stream_task = asyncio.create_task(watch_changes(get_database(), change_broker))
+    if settings.DRIVE_JOBS_IN_PROCESS:
+        drive_upload_workers.extend(start_workers(settings.DRIVE_JOBS_CONCURRENCY))
+    upload_session_sweep = asyncio.create_task(sweep_forever())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close MongoDB connection on shutdown."""
+    if change_stream_task:
+        change_stream_task.cancel()
+    for worker in drive_upload_workers:
+        worker.cancel()
+    if upload_session_sweep:
+        upload_session_sweep.cancel()
     close_mongo_connection()
 
 
@@ -48,11 +104,62 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Liveness check endpoint. Does not touch the database."""
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """In-process counters of this worker: caches, connection pool and event streams."""
+    return {
+        "admission": admission.stats(),
+        "auth_cache": auth_cache.stats(),
+        "pool": mongodb_utils.pool_stats.snapshot(),
+        "events": change_broker.stats(),
+        "password_hashing": hashing_stats(),
+        "drive_folders": folder_cache.stats(),
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness check endpoint.
+
+    Returns 503 until the connection pool is warm and MongoDB answers a ping,
+    so load balancers only route traffic to workers that can serve it. A
+    cold pool is warmed up in the background, one warm-up at a time, so the
+    check itself never waits longer than ``READINESS_PING_TIMEOUT_MS``.
+    """
+    global readiness_warm_up
+    if not mongodb_utils.pool_warm and (readiness_warm_up is None or readiness_warm_up.done()):
+        readiness_warm_up = asyncio.create_task(warm_up())
+        readiness_warm_up.add_done_callback(_warm_up_done)
+
+    body = {"pool": mongodb_utils.pool_stats.snapshot()}
+    try:
+        latency_ms = await asyncio.wait_for(
+            mongodb_utils.ping(),
+            timeout=settings.READINESS_PING_TIMEOUT_MS / 1000
+        )
+    except Exception as e:
+        body.update({"status": "unavailable", "error": type(e).__name__})
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=body)
+
+    body["ping_ms"] = round(latency_ms, 2)
+    if not mongodb_utils.pool_warm:
+        body["status"] = "warming_up"
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=body)
+
+    body["status"] = "ready"
+    return body
+
+
 # Include routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_PREFIX}/auth", tags=["authentication"])
 app.include_router(tasks.router, prefix=f"{settings.API_V1_PREFIX}/tasks", tags=["tasks"])
 app.include_router(notes.router, prefix=f"{settings.API_V1_PREFIX}/notes", tags=["notes"])
+app.include_router(search.router, prefix=f"{settings.API_V1_PREFIX}/search", tags=["search"])
+app.include_router(analytics.router, prefix=f"{settings.API_V1_PREFIX}/analytics", tags=["analytics"])
+app.include_router(sync.router, prefix=f"{settings.API_V1_PREFIX}/sync", tags=["sync"])
+app.include_router(events.router, prefix=f"{settings.API_V1_PREFIX}/events", tags=["events"])
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Optional, List, Literal
+from datetime import date
+
+TimeReportGroup = Literal["day", "week", "priority", "quadrant", "tag"]
+
+
+class TimeReportBucket(BaseModel):
+    key: str
+    seconds: int
+    sessions: Optional[int] = None  # only for day and week reports
+
+
+class TimeReport(BaseModel):
+    group_by: TimeReportGroup
+    start: date
+    end: date
+    total_seconds: int
+    buckets: List[TimeReportBucket]
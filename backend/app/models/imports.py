@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class ImportLineError(BaseModel):
+    line: int  # 1-based line number in the uploaded file
+    error: str
+
+
+class ImportResult(BaseModel):
+    """Outcome of an NDJSON import."""
+    received: int  # non-blank lines read
+    imported: int
+    failed: int
+    errors: List[ImportLineError] = []
+    errors_truncated: bool = False  # more errors than IMPORT_MAX_ERRORS
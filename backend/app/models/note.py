@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Literal, Tuple
 from datetime import datetime
 
 
@@ -10,6 +10,8 @@ class NoteBase(BaseModel):
     tags: List[str] = []
     note_type: Optional[str] = "text"  # "text" or "video"
     video_url: Optional[str] = None  # Google Drive URL for video notes
+    video_size: Optional[int] = None  # bytes
+    video_sha256: Optional[str] = None
 
 
 class NoteCreate(NoteBase):
@@ -44,3 +46,60 @@ class NoteResponse(NoteBase):
                 "updated_at": "2023-01-01T00:00:00"
             }
         }
+
+
+class NoteSearchResult(NoteResponse):
+    """Search hit: the note plus its relevance and highlighted snippet."""
+    score: float
+    snippet: str = ""
+    highlights: List[Tuple[int, int]] = []  # [start, end) offsets in snippet
+    title_highlights: List[Tuple[int, int]] = []  # [start, end) offsets in title
+
+
+class VideoUploadStatus(BaseModel):
+    """Progress of the background Drive upload of a video note."""
+    note_id: str
+    status: Literal["queued", "running", "done", "failed", "cancelled"]
+    attempts: int
+    size: int
+    bytes_uploaded: int
+    progress: float  # 0..1
+    drive_url: Optional[str] = None
+    error: Optional[str] = None
+    next_attempt_at: Optional[datetime] = None  # when queued for a retry
+    updated_at: datetime
+
+
+class VideoUploadSessionCreate(BaseModel):
+    """Start of a resumable video upload."""
+    title: str
+    folder: str = "General"
+    filename: Optional[str] = None  # original name, for the extension
+    mime_type: str = "video/webm"
+    size: int = Field(..., gt=0)
+
+
+class VideoUploadSession(BaseModel):
+    """State of a resumable video upload."""
+    id: str
+    status: Literal["open", "completing", "completed"]
+    size: int
+    chunk_size: int
+    received_bytes: int
+    offset: int  # bytes received without gaps from the start
+    missing_chunks: List[int]  # indexes; chunk i starts at i * chunk_size
+    note_id: Optional[str] = None
+    expires_at: datetime
+
+
+class NoteSummary(BaseModel):
+    """Lightweight note representation with a content preview."""
+    id: str
+    title: str
+    content_preview: str = ""
+    folder: Optional[str] = "General"
+    tags: List[str] = []
+    note_type: Optional[str] = "text"
+    video_url: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import Literal
+
+
+class AutocompleteItem(BaseModel):
+    kind: Literal["note", "task"]
+    id: str
+    title: str
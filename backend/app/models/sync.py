@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Literal
+from datetime import datetime
+from app.models.note import NoteResponse
+from app.models.task import TaskResponse
+
+
+class Tombstone(BaseModel):
+    kind: Literal["task", "note"]
+    id: str
+    deleted_at: datetime
+
+
+class SyncResponse(BaseModel):
+    """Changes since a sync token. Items may repeat across calls; apply them idempotently."""
+    tasks: List[TaskResponse]
+    notes: List[NoteResponse]
+    deleted: List[Tombstone]
+    next_token: str
+    has_more: bool  # call again with next_token right away
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -53,7 +53,6 @@ class TaskBase(BaseModel):
     board_id: Optional[str] = None
     list_name: Optional[str] = "Pendientes"
     eisenhower_quadrant: Optional[EisenhowerQuadrant] = None
-    time_entries: List[TimeEntry] = []
     total_time_spent: int = 0  # in seconds
     is_running: bool = False
     current_session_start: Optional[datetime] = None
@@ -80,7 +79,6 @@ class TaskUpdate(BaseModel):
     board_id: Optional[str] = None
     list_name: Optional[str] = None
     eisenhower_quadrant: Optional[EisenhowerQuadrant] = None
-    time_entries: Optional[List[TimeEntry]] = None
     total_time_spent: Optional[int] = None
     is_running: Optional[bool] = None
     current_session_start: Optional[datetime] = None
@@ -96,6 +94,10 @@ class TaskUpdate(BaseModel):
 class TaskResponse(TaskBase):
     id: str
     user_id: str
+    # Time entries live in the time_entries collection; the task keeps
+    # aggregates, maintained by the timer routes only
+    time_entry_count: int = 0
+    last_time_entry: Optional[TimeEntry] = None
     created_at: datetime
     updated_at: datetime
     
@@ -112,3 +114,67 @@ class TaskResponse(TaskBase):
                 "updated_at": "2023-01-01T00:00:00"
             }
         }
+
+
+class TaskStats(BaseModel):
+    """Dashboard counters of a user's tasks."""
+    total: int = 0
+    running: int = 0
+    overdue: int = 0
+    by_status: Dict[str, int] = {}
+    by_priority: Dict[str, int] = {}
+    by_quadrant: Dict[str, int] = {}
+
+
+class TaskSummary(BaseModel):
+    """Lightweight task representation for board and list views."""
+    id: str
+    title: str
+    status: TaskStatus = TaskStatus.BACKLOG
+    priority: Priority = Priority.MEDIUM
+    due_date: Optional[datetime] = None
+    tags: List[str] = []
+    board_id: Optional[str] = None
+    list_name: Optional[str] = "Pendientes"
+    eisenhower_quadrant: Optional[EisenhowerQuadrant] = None
+    total_time_spent: int = 0
+    is_running: bool = False
+    current_session_start: Optional[datetime] = None
+    completion_date: Optional[datetime] = None
+    subtasks_total: int = 0
+    subtasks_completed: int = 0
+    created_at: datetime
+    updated_at: datetime
+
+
+class TaskBulkOperation(BaseModel):
+    """
+    One item of a bulk request.
+
+    ``create`` takes ``task``; ``update`` takes ``id`` and ``update``;
+    ``set_status`` takes ``id`` and ``status``; ``delete`` takes ``id``.
+    """
+    op: Literal["create", "update", "set_status", "delete"]
+    id: Optional[str] = None
+    task: Optional[TaskCreate] = None
+    update: Optional[TaskUpdate] = None
+    status: Optional[TaskStatus] = None
+
+
+class TaskBulkRequest(BaseModel):
+    operations: List[TaskBulkOperation] = Field(default=[], max_length=1000)
+    ordered: bool = False  # stop at the first failing operation
+    fetch_ids: List[str] = Field(default=[], max_length=1000)  # returned after the writes
+
+
+class TaskBulkItemResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[str] = None
+    status: Literal["ok", "not_found", "invalid", "error", "skipped"]
+    error: Optional[str] = None
+
+
+class TaskBulkResponse(BaseModel):
+    results: List[TaskBulkItemResult]
+    tasks: List[TaskResponse] = []
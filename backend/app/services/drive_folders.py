@@ -0,0 +1,185 @@
+"""
+Drive folder resolution with a two-level cache.
+
+Uploads go to a folder path built from ``DRIVE_FOLDER_LAYOUT`` (for example
+``Video/Notas`` or ``OneDate/{user_id}/{folder}``). Resolving a path walks
+it one segment at a time; each (parent id, name) pair is looked up in:
+
+1. an in-process LRU cache (``TTLCache``);
+2. the ``drive_folders`` collection, shared by all workers:
+   ``{_id: "<parent id>/<name>", folder_id, locked_until, updated_at}``;
+3. Drive itself (``find_folder``, then ``create_folder`` if missing).
+
+Only one caller creates a given folder: concurrent callers in a process
+wait on the same future, and other processes wait while the Mongo entry is
+locked (``folder_id: null``, ``locked_until`` in the future). A lock left by
+a crashed process expires after ``CREATE_LOCK_SECONDS``.
+
+Cached ids can go stale when a folder is deleted in Drive. Backends raise
+``FolderNotFound`` in that case; ``invalidate`` drops the path from both
+levels so the next resolution asks Drive again. Other workers' in-process
+entries are dropped the same way, on their own first failure.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from pymongo.errors import DuplicateKeyError
+from app.core.auth_cache import TTLCache
+from app.core.config import settings
+from app.db.mongodb_utils import get_database
+
+ROOT_FOLDER_ID = "root"
+
+# Seconds a process may hold the creation lock of a folder
+CREATE_LOCK_SECONDS = 30
+# Seconds between checks while another process creates a folder
+CREATE_WAIT_SECONDS = 0.5
+
+
+class FolderNotFound(Exception):
+    """A folder (usually a cached id) no longer exists in Drive."""
+
+
+def folder_path(user_id: str, note: dict) -> str:
+    """
+    Folder path of a note's video, from ``DRIVE_FOLDER_LAYOUT``.
+
+    Placeholders: ``{user_id}``, ``{folder}`` (the note's folder), ``{year}``
+    and ``{month}`` (of the note's creation). Slashes inside values do not
+    create extra levels.
+    """
+    created_at = note.get("created_at") or datetime.utcnow()
+    values = {
+        "user_id": user_id,
+        "folder": note.get("folder") or "General",
+        "year": created_at.strftime("%Y"),
+        "month": created_at.strftime("%m"),
+    }
+    segments = []
+    for template in settings.DRIVE_FOLDER_LAYOUT.split("/"):
+        segment = template.format(**values).replace("/", "-").strip()
+        if segment:
+            segments.append(segment)
+    return "/".join(segments)
+
+
+class FolderCache:
+    """Resolves folder paths to Drive ids; see the module docstring."""
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._ids = TTLCache("drive_folders", max_size)
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.drive_lookups = 0
+        self.created = 0
+        self.invalidations = 0
+
+    async def resolve(self, backend, path: str) -> str:
+        """Id of the folder at ``path``, creating missing levels."""
+        parent_id = ROOT_FOLDER_ID
+        for name in path.split("/"):
+            parent_id = await self._child(backend, parent_id, name)
+        return parent_id
+
+    async def invalidate(self, path: str) -> None:
+        """Forget every level of ``path``, in this process and in Mongo."""
+        db = get_database()
+        self.invalidations += 1
+        keys: List[str] = []
+        parent_id: Optional[str] = ROOT_FOLDER_ID
+        for name in path.split("/"):
+            key = f"{parent_id}/{name}"
+            keys.append(key)
+            parent_id = self._ids.get(key)
+            self._ids.invalidate(key)
+            if parent_id is None:
+                doc = await db.drive_folders.find_one({"_id": key})
+                parent_id = doc.get("folder_id") if doc else None
+            if parent_id is None:
+                break
+        # Entries still locked belong to a creation in progress elsewhere
+        await db.drive_folders.delete_many({"_id": {"$in": keys}, "folder_id": {"$ne": None}})
+
+    async def _child(self, backend, parent_id: str, name: str) -> str:
+        key = f"{parent_id}/{name}"
+        folder_id = self._ids.get(key)
+        if folder_id is not None:
+            return folder_id
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            folder_id = await self._lookup(backend, parent_id, name, key)
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting; do not log it as unretrieved
+            future.exception()
+            raise
+        else:
+            self._ids.set(key, folder_id, self.ttl_seconds)
+            future.set_result(folder_id)
+            return folder_id
+        finally:
+            del self._pending[key]
+
+    async def _lookup(self, backend, parent_id: str, name: str, key: str) -> str:
+        """Shared cache entry, else find or create the folder under the Mongo lock."""
+        db = get_database()
+        while True:
+            doc = await db.drive_folders.find_one({"_id": key})
+            if doc and doc.get("folder_id"):
+                return doc["folder_id"]
+
+            now = datetime.utcnow()
+            locked_until = now + timedelta(seconds=CREATE_LOCK_SECONDS)
+            if doc is None:
+                try:
+                    await db.drive_folders.insert_one(
+                        {"_id": key, "folder_id": None, "locked_until": locked_until, "updated_at": now}
+                    )
+                    break
+                except DuplicateKeyError:
+                    continue
+            if doc["locked_until"] < now:
+                # Abandoned by a crashed process
+                result = await db.drive_folders.update_one(
+                    {"_id": key, "folder_id": None, "locked_until": doc["locked_until"]},
+                    {"$set": {"locked_until": locked_until, "updated_at": now}},
+                )
+                if result.modified_count:
+                    break
+                continue
+            await asyncio.sleep(CREATE_WAIT_SECONDS)
+
+        try:
+            # Drive may already have it (created before the cache, or by hand)
+            self.drive_lookups += 1
+            folder_id = await run_in_threadpool(backend.find_folder, name, parent_id)
+            if folder_id is None:
+                folder_id = await run_in_threadpool(backend.create_folder, name, parent_id)
+                self.created += 1
+        except BaseException:
+            await db.drive_folders.delete_one({"_id": key, "folder_id": None})
+            raise
+
+        await db.drive_folders.update_one(
+            {"_id": key},
+            {"$set": {"folder_id": folder_id, "locked_until": None, "updated_at": datetime.utcnow()}},
+        )
+        return folder_id
+
+    def stats(self) -> dict:
+        return {
+            **self._ids.stats(),
+            "drive_lookups": self.drive_lookups,
+            "created": self.created,
+            "invalidations": self.invalidations,
+        }
+
+
+folder_cache = FolderCache(settings.DRIVE_FOLDER_CACHE_SIZE, settings.DRIVE_FOLDER_CACHE_TTL_SECONDS)
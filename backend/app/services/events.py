@@ -0,0 +1,217 @@
+import asyncio
+import uuid
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Set, Tuple
+from pymongo.errors import OperationFailure
+from app.core.config import settings
+
+# Change events are small and carry ids only; clients fetch what they need
+# (conditional GETs or /sync):
+#   {"kind": "task" | "note", "op": "created" | "updated" | "deleted", "ids": [...]}
+#
+# Event ids are "<epoch>-<sequence>". The epoch changes with every process,
+# so an id from another worker or from before a restart cannot be resumed
+# and gets a reset instead.
+
+CHANGE_STREAM_HISTORY_LOST = 286
+
+
+class TooManyStreams(Exception):
+    """The user already has ``EVENTS_MAX_STREAMS_PER_USER`` open streams."""
+
+
+class Subscription:
+    """One open stream: a bounded queue of (event id, payload) pairs."""
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # Set when events were lost (slow consumer or unknown resume point);
+        # the stream tells the client to resync.
+        self.needs_reset = False
+
+
+class _History:
+    """Recent events of one user, for resuming after a reconnect."""
+
+    def __init__(self, size: int, dropped_through: int):
+        self.events: deque = deque(maxlen=size)
+        # Events up to this sequence number can no longer be replayed
+        self.dropped_through = dropped_through
+
+    def append(self, sequence: int, payload: dict) -> None:
+        if len(self.events) == self.events.maxlen:
+            self.dropped_through = self.events[0][0]
+        self.events.append((sequence, payload))
+
+
+class ChangeBroker:
+    """
+    In-process pub/sub of task and note changes, per user.
+
+    With ``EVENTS_SOURCE=local`` the CRUD write paths publish directly. With
+    ``change_stream`` every worker is fed from a MongoDB change stream
+    instead (see ``watch_changes``), so writes served by other workers
+    reach all streams too.
+    """
+
+    def __init__(self, source: str, queue_size: int, replay_size: int, max_streams_per_user: int, max_users: int):
+        self.source = source
+        self.queue_size = queue_size
+        self.replay_size = replay_size
+        self.max_streams_per_user = max_streams_per_user
+        self.max_users = max_users
+        self.epoch = uuid.uuid4().hex[:8]
+        self._sequence = 0
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._history: "OrderedDict[str, _History]" = OrderedDict()
+
+    def event_id(self, sequence: int) -> str:
+        return f"{self.epoch}-{sequence}"
+
+    def latest_event_id(self) -> str:
+        return self.event_id(self._sequence)
+
+    def publish(self, user_id: str, kind: str, op: str, ids: List[str]) -> None:
+        """Called by the CRUD write paths after a successful write."""
+        if self.source == "local" and ids:
+            self.dispatch(user_id, {"kind": kind, "op": op, "ids": ids})
+
+    def dispatch(self, user_id: str, payload: dict) -> None:
+        self._sequence += 1
+        history = self._history.get(user_id)
+        if history is not None:
+            history.append(self._sequence, payload)
+        event = (self.event_id(self._sequence), payload)
+        for subscription in self._subscribers.get(user_id, ()):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.needs_reset = True
+
+    def check_capacity(self, user_id: str) -> None:
+        """Raise ``TooManyStreams`` if ``user_id`` cannot open another stream."""
+        if len(self._subscribers.get(user_id, ())) >= self.max_streams_per_user:
+            raise TooManyStreams()
+
+    def subscribe(self, user_id: str, last_event_id: Optional[str] = None) -> Subscription:
+        """
+        Open a stream for ``user_id``, replaying the events after
+        ``last_event_id`` when they are still known.
+        """
+        self.check_capacity(user_id)
+        subscribers = self._subscribers.setdefault(user_id, set())
+
+        history = self._history.get(user_id)
+        if history is None:
+            history = self._history[user_id] = _History(self.replay_size, self._sequence)
+            while len(self._history) > self.max_users:
+                self._history.popitem(last=False)
+        self._history.move_to_end(user_id)
+
+        subscription = Subscription(self.queue_size)
+        if last_event_id:
+            after = self._resume_point(last_event_id, history)
+            if after is None:
+                subscription.needs_reset = True
+            else:
+                backlog = [(seq, payload) for seq, payload in history.events if seq > after]
+                if len(backlog) > self.queue_size:
+                    subscription.needs_reset = True
+                else:
+                    for sequence, payload in backlog:
+                        subscription.queue.put_nowait((self.event_id(sequence), payload))
+        subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id: str, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(user_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[user_id]
+
+    def _resume_point(self, last_event_id: str, history: _History) -> Optional[int]:
+        epoch, _, sequence = last_event_id.partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        if sequence < history.dropped_through or sequence > self._sequence:
+            return None
+        return sequence
+
+    def stats(self) -> dict:
+        return {
+            "source": self.source,
+            "users": len(self._subscribers),
+            "streams": sum(len(subscribers) for subscribers in self._subscribers.values()),
+        }
+
+
+def _change_event(change: dict) -> Optional[Tuple[str, dict]]:
+    """(user_id, payload) for a change stream event, if it concerns a user."""
+    collection = change["ns"]["coll"]
+    doc = change.get("fullDocument") or {}
+    if not doc.get("user_id"):
+        # Updated document already deleted again; its tombstone follows
+        return None
+    if collection == "tombstones":
+        return doc["user_id"], {"kind": doc["kind"], "op": "deleted", "ids": [doc["item_id"]]}
+    op = "created" if change["operationType"] == "insert" else "updated"
+    return doc["user_id"], {"kind": collection[:-1], "op": op, "ids": [str(change["documentKey"]["_id"])]}
+
+
+async def watch_changes(db, broker: "ChangeBroker") -> None:
+    """
+    Feed ``broker`` from a MongoDB change stream (replica set required).
+
+    Deletions are observed through tombstone inserts, which carry the owner.
+    Runs until cancelled, resuming after errors where it left off.
+    """
+    pipeline = [
+        {
+            "$match": {
+                "ns.coll": {"$in": ["tasks", "notes", "tombstones"]},
+                "operationType": {"$in": ["insert", "update", "replace"]},
+            }
+        },
+        {
+            "$project": {
+                "ns": 1,
+                "operationType": 1,
+                "documentKey": 1,
+                "fullDocument.user_id": 1,
+                "fullDocument.kind": 1,
+                "fullDocument.item_id": 1,
+            }
+        },
+    ]
+    resume_after = None
+    while True:
+        try:
+            async with db.watch(pipeline, full_document="updateLookup", resume_after=resume_after) as stream:
+                async for change in stream:
+                    resume_after = stream.resume_token
+                    event = _change_event(change)
+                    if event:
+                        broker.dispatch(*event)
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            if e.code == CHANGE_STREAM_HISTORY_LOST:
+                # The oplog moved past our position; continue from now on
+                resume_after = None
+            print(f"Warning: Change stream interrupted: {e}")
+            await asyncio.sleep(1)
+        except Exception as e:
+            print(f"Warning: Change stream interrupted: {e}")
+            await asyncio.sleep(1)
+
+
+change_broker = ChangeBroker(
+    source=settings.EVENTS_SOURCE,
+    queue_size=settings.EVENTS_QUEUE_SIZE,
+    replay_size=settings.EVENTS_REPLAY_SIZE,
+    max_streams_per_user=settings.EVENTS_MAX_STREAMS_PER_USER,
+    max_users=settings.EVENTS_MAX_USERS,
+)
@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from typing import AsyncIterator, List
+from bson import ObjectId
+from fastapi.responses import StreamingResponse
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Output is sent in chunks of about this size; the first record is sent on
+# its own so the download starts right away.
+FLUSH_BYTES = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def _csv_value(value) -> str:
+    """Scalars as text; lists and objects (tags, subtasks...) as JSON."""
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=_json_default, ensure_ascii=False)
+    return str(_json_default(value) if isinstance(value, (ObjectId, Enum)) else value)
+
+
+def _csv_line(values: List) -> bytes:
+    out = io.StringIO()
+    csv.writer(out).writerow(values)
+    return out.getvalue().encode()
+
+
+async def export_stream(
+    docs: AsyncIterator[dict],
+    format: str,
+    columns: List[str],
+    compress: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    Serialize documents from a Mongo cursor as NDJSON or CSV, one at a time.
+
+    ``_id`` is exported as ``id``; ``columns`` are the fields exported, and
+    the CSV header and order. Anything else stored on the documents is left
+    out. With ``compress`` the output is a single gzip stream.
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+    buffer = bytearray()
+    first = True
+
+    def take(final: bool = False) -> bytes:
+        data = bytes(buffer)
+        buffer.clear()
+        if compressor is None:
+            return data
+        if final:
+            return compressor.compress(data) + compressor.flush()
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH if first else zlib.Z_NO_FLUSH)
+
+    if format == "csv":
+        buffer += _csv_line(columns)
+
+    async for doc in docs:
+        doc = {"id": str(doc.pop("_id")), **doc}
+        if format == "csv":
+            buffer += _csv_line([_csv_value(doc.get(column)) for column in columns])
+        else:
+            record = {column: doc[column] for column in columns if column in doc}
+            buffer += json.dumps(record, default=_json_default, ensure_ascii=False).encode() + b"\n"
+        if first or len(buffer) >= FLUSH_BYTES:
+            chunk = take()
+            first = False
+            if chunk:
+                yield chunk
+
+    chunk = take(final=True)
+    if chunk:
+        yield chunk
+
+
+def export_response(
+    docs: AsyncIterator[dict],
+    name: str,
+    format: str,
+    columns: List[str],
+    compress: bool = False
+) -> StreamingResponse:
+    """Download response streaming ``docs`` as ``<name>-<date>.<format>[.gz]``."""
+    filename = f"{name}-{datetime.utcnow().strftime('%Y%m%d')}.{format}"
+    media_type = MEDIA_TYPES[format]
+    if compress:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        export_stream(docs, format, columns, compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
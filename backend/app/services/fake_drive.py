@@ -0,0 +1,90 @@
+import os
+import uuid
+from typing import Callable, Dict, Optional, Tuple
+from app.services.drive_folders import ROOT_FOLDER_ID, FolderNotFound
+
+
+class FakeDriveService:
+    """
+    Local stand-in for GoogleDriveService's upload interface.
+
+    Copies files into ``directory`` in chunks, reporting progress like a
+    resumable upload. Set ``failures`` to make the next uploads raise, to
+    exercise retries. Folders only exist in memory; ``delete_folder``
+    simulates a folder removed in Drive, and ``folder_calls`` counts the
+    lookups and creations. Selected with ``DRIVE_BACKEND=fake``.
+    """
+
+    def __init__(self, directory: str, chunk_size: int = 256 * 1024):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.failures = 0
+        self.uploads = []
+        self.folders: Dict[Tuple[str, str], str] = {}
+        self.folder_calls = 0
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def _folder_exists(self, folder_id: str) -> bool:
+        return folder_id == ROOT_FOLDER_ID or folder_id in self.folders.values()
+
+    def find_folder(self, name: str, parent_id: str) -> Optional[str]:
+        self.folder_calls += 1
+        return self.folders.get((parent_id, name))
+
+    def create_folder(self, name: str, parent_id: str) -> str:
+        self.folder_calls += 1
+        if not self._folder_exists(parent_id):
+            raise FolderNotFound(parent_id)
+        folder_id = uuid.uuid4().hex
+        self.folders[(parent_id, name)] = folder_id
+        return folder_id
+
+    def delete_folder(self, folder_id: str) -> None:
+        """Remove a folder and everything below it."""
+        children = [child for (parent, _), child in self.folders.items() if parent == folder_id]
+        self.folders = {key: value for key, value in self.folders.items() if value != folder_id}
+        for child in children:
+            self.delete_folder(child)
+
+    def upload_file(
+        self,
+        path: str,
+        filename: str,
+        mime_type: str = "video/webm",
+        on_progress: Optional[Callable[[int], None]] = None,
+        folder_id: Optional[str] = None
+    ) -> str:
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("Simulated Drive failure")
+        if folder_id is not None and not self._folder_exists(folder_id):
+            raise FolderNotFound(folder_id)
+
+        os.makedirs(self.directory, exist_ok=True)
+        file_id = uuid.uuid4().hex
+        uploaded = 0
+        with open(path, "rb") as source, open(os.path.join(self.directory, f"{file_id}-{filename}"), "wb") as target:
+            while True:
+                chunk = source.read(self.chunk_size)
+                if not chunk:
+                    break
+                target.write(chunk)
+                uploaded += len(chunk)
+                if on_progress:
+                    on_progress(uploaded)
+        self.uploads.append(filename)
+        return f"https://drive.fake/file/d/{file_id}/view"
+
+    def delete_video(self, file_url: str) -> bool:
+        file_id = file_url.split("/d/")[1].split("/")[0] if "/d/" in file_url else None
+        if not file_id or not os.path.isdir(self.directory):
+            return False
+        for name in os.listdir(self.directory):
+            if name.startswith(f"{file_id}-"):
+                os.remove(os.path.join(self.directory, name))
+                return True
+        return False
+
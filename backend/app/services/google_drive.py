@@ -1,10 +1,22 @@
 import os
 import io
-from typing import Optional
+from typing import Callable, Optional
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
 from app.core.config import settings
+from app.services.drive_folders import ROOT_FOLDER_ID, FolderNotFound
+
+# Resumable upload chunk size (Drive requires a multiple of 256 KiB)
+DRIVE_CHUNK_SIZE = 8 * 1024 * 1024
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+
+def _quote(value: str) -> str:
+    """Escape a value for a Drive query string literal."""
+    return value.replace('\\', '\\\\').replace("'", "\\'")
 
 
 class GoogleDriveService:
@@ -30,42 +42,53 @@ class GoogleDriveService:
             print(f"Warning: Could not initialize Google Drive service: {e}")
             # Service remains None, which is handled in upload methods
     
+    def find_folder(self, name: str, parent_id: str) -> Optional[str]:
+        """Id of the folder ``name`` directly under ``parent_id``, if any."""
+        query = (
+            f"name='{_quote(name)}' and '{_quote(parent_id)}' in parents "
+            f"and mimeType='{FOLDER_MIME_TYPE}' and trashed=false"
+        )
+        results = self.service.files().list(
+            q=query,
+            spaces='drive',
+            fields='files(id, name)'
+        ).execute()
+        folders = results.get('files', [])
+        return folders[0]['id'] if folders else None
+    
+    def create_folder(self, name: str, parent_id: str) -> str:
+        """Create the folder ``name`` under ``parent_id``. Returns its id."""
+        folder_metadata = {
+            'name': name,
+            'mimeType': FOLDER_MIME_TYPE,
+            'parents': [parent_id]
+        }
+        try:
+            folder = self.service.files().create(
+                body=folder_metadata,
+                fields='id'
+            ).execute()
+        except HttpError as e:
+            if e.resp.status == 404:
+                raise FolderNotFound(parent_id) from e
+            raise
+        return folder['id']
+    
     def _get_or_create_folder(self, folder_path: str) -> Optional[str]:
-        """Get or create a folder in Google Drive."""
+        """
+        Get or create a folder in Google Drive, asking Drive for every level.
+        
+        Uncached; the background upload jobs resolve folders through
+        ``app.services.drive_folders`` instead.
+        """
         if not self.service:
             return None
         
         try:
             # Split path into parts (e.g., "Video/Notas" -> ["Video", "Notas"])
-            parts = folder_path.split('/')
-            parent_id = 'root'
-            
-            for folder_name in parts:
-                # Search for folder
-                query = f"name='{folder_name}' and '{parent_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-                results = self.service.files().list(
-                    q=query,
-                    spaces='drive',
-                    fields='files(id, name)'
-                ).execute()
-                
-                folders = results.get('files', [])
-                
-                if folders:
-                    parent_id = folders[0]['id']
-                else:
-                    # Create folder
-                    folder_metadata = {
-                        'name': folder_name,
-                        'mimeType': 'application/vnd.google-apps.folder',
-                        'parents': [parent_id]
-                    }
-                    folder = self.service.files().create(
-                        body=folder_metadata,
-                        fields='id'
-                    ).execute()
-                    parent_id = folder['id']
-            
+            parent_id = ROOT_FOLDER_ID
+            for folder_name in folder_path.split('/'):
+                parent_id = self.find_folder(folder_name, parent_id) or self.create_folder(folder_name, parent_id)
             return parent_id
         except Exception as e:
             print(f"Error creating folder: {e}")
@@ -83,6 +106,73 @@ class GoogleDriveService:
         Returns:
             URL to access the file in Google Drive or None if upload fails
         """
+        return self._upload(
+            MediaIoBaseUpload(io.BytesIO(file_content), mimetype=mime_type, resumable=True),
+            filename
+        )
+    
+    @property
+    def available(self) -> bool:
+        return self.service is not None
+    
+    def upload_file(
+        self,
+        path: str,
+        filename: str,
+        mime_type: str = 'video/webm',
+        on_progress: Optional[Callable[[int], None]] = None,
+        folder_id: Optional[str] = None
+    ) -> str:
+        """
+        Upload a file from disk to Google Drive, in ``folder_id`` or else
+        in the Video/Notas folder.
+        
+        Used by the background upload jobs: the file is sent in
+        DRIVE_CHUNK_SIZE pieces of a resumable upload and errors are raised
+        so the job can be retried.
+        
+        Args:
+            path: Path of the file on local disk
+            filename: Name of the file in Drive
+            mime_type: MIME type of the file
+            on_progress: Called with the number of bytes uploaded so far
+            folder_id: Target folder (e.g. from the folder cache)
+            
+        Returns:
+            URL to access the file in Google Drive
+        
+        Raises:
+            FolderNotFound: ``folder_id`` no longer exists
+        """
+        if not self.service:
+            raise RuntimeError("Google Drive service not initialized")
+        
+        if folder_id is None:
+            folder_id = self._get_or_create_folder('Video/Notas')
+            if not folder_id:
+                raise RuntimeError("Could not get or create the Video/Notas folder")
+        
+        media = MediaFileUpload(path, mimetype=mime_type, chunksize=DRIVE_CHUNK_SIZE, resumable=True)
+        request = self.service.files().create(
+            body={'name': filename, 'parents': [folder_id]},
+            media_body=media,
+            fields='id, webViewLink, webContentLink'
+        )
+        response = None
+        try:
+            while response is None:
+                status, response = request.next_chunk()
+                if status and on_progress:
+                    on_progress(status.resumable_progress)
+        except HttpError as e:
+            if e.resp.status == 404:
+                raise FolderNotFound(folder_id) from e
+            raise
+        if on_progress:
+            on_progress(media.size())
+        return response.get('webViewLink') or response.get('webContentLink')
+    
+    def _upload(self, media, filename: str) -> Optional[str]:
         if not self.service:
             print("Google Drive service not initialized. Video will not be uploaded to Drive.")
             return None
@@ -99,13 +189,6 @@ class GoogleDriveService:
                 'parents': [folder_id]
             }
             
-            # Create media upload
-            media = MediaIoBaseUpload(
-                io.BytesIO(file_content),
-                mimetype=mime_type,
-                resumable=True
-            )
-            
             # Upload file
             file = self.service.files().create(
                 body=file_metadata,
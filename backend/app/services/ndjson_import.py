@@ -0,0 +1,105 @@
+import json
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from app.core.config import settings
+
+# Inserts a batch of validated records and returns {position in batch: error}
+# for the ones that could not be written.
+InsertBatch = Callable[[List[BaseModel]], Awaitable[Dict[int, str]]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Split a byte stream into (line number, line) pairs.
+
+    Lines longer than ``max_line_bytes`` are yielded as ``None`` so the
+    caller can report them; their bytes are discarded as they arrive.
+    """
+    # Pieces of the line still being received, joined once it is complete
+    partial: List[bytes] = []
+    partial_size = 0
+    number = 0
+    oversized = False
+    async for chunk in chunks:
+        lines = chunk.split(b"\n")
+        for line in lines[:-1]:
+            number += 1
+            if oversized or partial_size + len(line) > max_line_bytes:
+                yield number, None
+            else:
+                yield number, b"".join(partial) + line if partial else line
+            partial, partial_size, oversized = [], 0, False
+        tail = lines[-1]
+        if tail and not oversized:
+            partial.append(tail)
+            partial_size += len(tail)
+            if partial_size > max_line_bytes:
+                partial, partial_size, oversized = [], 0, True
+    if partial or oversized:
+        yield number + 1, None if oversized else b"".join(partial)
+
+
+def _validation_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+
+async def import_ndjson(
+    chunks: AsyncIterator[bytes],
+    model: Type[BaseModel],
+    insert_batch: InsertBatch,
+    batch_size: int = settings.IMPORT_BATCH_SIZE,
+    max_line_bytes: int = settings.IMPORT_MAX_LINE_BYTES,
+    max_errors: int = settings.IMPORT_MAX_ERRORS
+) -> dict:
+    """
+    Validate NDJSON records with ``model`` as they are read and insert them
+    in batches of ``batch_size``.
+
+    Only the current batch is held in memory. Invalid lines are skipped and
+    reported with their line number; the first ``max_errors`` are returned.
+    """
+    result = {"received": 0, "imported": 0, "failed": 0, "errors": [], "errors_truncated": False}
+
+    def fail(line: int, message: str) -> None:
+        result["failed"] += 1
+        if len(result["errors"]) < max_errors:
+            result["errors"].append({"line": line, "error": message})
+        else:
+            result["errors_truncated"] = True
+
+    batch: List[BaseModel] = []
+    lines: List[int] = []
+
+    async def flush() -> None:
+        failed = await insert_batch(batch)
+        for position, line in enumerate(lines):
+            if position in failed:
+                fail(line, failed[position])
+        result["imported"] += len(batch) - len(failed)
+        batch.clear()
+        lines.clear()
+
+    async for number, raw in iter_lines(chunks, max_line_bytes):
+        if raw is None:
+            result["received"] += 1
+            fail(number, f"Line longer than {max_line_bytes} bytes")
+            continue
+        if not raw.strip():
+            continue
+        result["received"] += 1
+        try:
+            record = model.model_validate(json.loads(raw))
+        except ValueError as e:
+            # json.JSONDecodeError, UnicodeDecodeError and ValidationError
+            fail(number, _validation_message(e) if isinstance(e, ValidationError) else "Invalid JSON")
+            continue
+        batch.append(record)
+        lines.append(number)
+        if len(batch) >= batch_size:
+            await flush()
+
+    if batch:
+        await flush()
+    return result
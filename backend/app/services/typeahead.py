@@ -0,0 +1,188 @@
+import asyncio
+import re
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.db.mongodb_utils import get_database
+
+# Upper bound on index entries inspected per query, which keeps latency
+# independent of how many items a user has.
+MAX_SCANNED_ENTRIES = 500
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-free words of ``text``."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _WORD.findall(stripped.lower())
+
+
+class UserPrefixIndex:
+    """Sorted array of (token, kind, item_id) for one user's titles."""
+
+    def __init__(self):
+        self.entries: List[Tuple[str, str, str]] = []
+        self.titles: Dict[Tuple[str, str], str] = {}
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[str, str, str]]) -> "UserPrefixIndex":
+        """Index of (kind, item_id, title) items, sorted once rather than per entry."""
+        index = cls()
+        for kind, item_id, title in items:
+            index.titles[(kind, item_id)] = title
+        index.entries = sorted({
+            (token, kind, item_id)
+            for (kind, item_id), title in index.titles.items()
+            for token in tokenize(title)
+        })
+        return index
+
+    def add(self, kind: str, item_id: str, title: str) -> None:
+        self.remove(kind, item_id)
+        self.titles[(kind, item_id)] = title
+        for token in set(tokenize(title)):
+            insort(self.entries, (token, kind, item_id))
+
+    def remove(self, kind: str, item_id: str) -> None:
+        title = self.titles.pop((kind, item_id), None)
+        if title is None:
+            return
+        for token in set(tokenize(title)):
+            position = bisect_left(self.entries, (token, kind, item_id))
+            if position < len(self.entries) and self.entries[position] == (token, kind, item_id):
+                del self.entries[position]
+
+    def search(self, query: str, limit: int, kinds: Optional[List[str]] = None) -> List[dict]:
+        """
+        Items whose title has a word starting with every word of ``query``.
+
+        The longest query word is used to scan the sorted array; the other
+        words filter the candidates. Title-prefix matches rank first, then
+        shorter titles.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        probe = max(words, key=len)
+        others = list(words)
+        others.remove(probe)
+
+        matches = {}
+        position = bisect_left(self.entries, (probe,))
+        scanned = 0
+        while position < len(self.entries) and scanned < MAX_SCANNED_ENTRIES:
+            token, kind, item_id = self.entries[position]
+            if not token.startswith(probe):
+                break
+            position += 1
+            scanned += 1
+            if (kinds and kind not in kinds) or (kind, item_id) in matches:
+                continue
+            title = self.titles[(kind, item_id)]
+            title_tokens = tokenize(title)
+            if all(any(t.startswith(word) for t in title_tokens) for word in others):
+                starts_title = title_tokens[0].startswith(words[0])
+                matches[(kind, item_id)] = (not starts_title, len(title), title)
+
+        ranked = sorted(matches.items(), key=lambda match: match[1])[:limit]
+        return [
+            {"kind": kind, "id": item_id, "title": title}
+            for (kind, item_id), (_, _, title) in ranked
+        ]
+
+
+class TypeaheadIndex:
+    """
+    Per-user prefix indexes of note and task titles.
+
+    Indexes are built lazily on the first query, kept up to date by the CRUD
+    write paths and rebuilt after ``TYPEAHEAD_INDEX_TTL_SECONDS`` to pick up
+    writes served by other workers. The rebuild runs in the background: the
+    stale index keeps answering meanwhile, and keeps doing so if the rebuild
+    fails. Least recently used users are evicted beyond
+    ``TYPEAHEAD_MAX_USERS``.
+    """
+
+    def __init__(self, max_users: int, ttl_seconds: int):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._indexes: "OrderedDict[str, UserPrefixIndex]" = OrderedDict()
+        self._building: Dict[str, asyncio.Task] = {}
+        self._pending: Dict[str, list] = {}
+
+    async def search(self, user_id: str, query: str, limit: int = 10, kinds: Optional[List[str]] = None) -> List[dict]:
+        index = await self._get(user_id)
+        return index.search(query, limit, kinds)
+
+    def upsert(self, user_id: str, kind: str, item_id: str, title: str) -> None:
+        self._apply(user_id, ("add", kind, item_id, title))
+
+    def remove(self, user_id: str, kind: str, item_id: str) -> None:
+        self._apply(user_id, ("remove", kind, item_id))
+
+    def _apply(self, user_id: str, operation: tuple) -> None:
+        if user_id in self._building:
+            # Replayed once the snapshot being loaded is in place
+            self._pending[user_id].append(operation)
+        index = self._indexes.get(user_id)
+        if index is not None:
+            getattr(index, operation[0])(*operation[1:])
+
+    async def _get(self, user_id: str) -> UserPrefixIndex:
+        index = self._indexes.get(user_id)
+        if index is not None:
+            self._indexes.move_to_end(user_id)
+            if time.monotonic() - index.built_at >= self.ttl_seconds and user_id not in self._building:
+                self._start_build(user_id)
+            return index
+
+        # Single flight: concurrent keystrokes share one build
+        if user_id not in self._building:
+            self._start_build(user_id)
+        return await asyncio.shield(self._building[user_id])
+
+    def _start_build(self, user_id: str) -> None:
+        self._pending[user_id] = []
+        task = asyncio.ensure_future(self._install(user_id))
+        self._building[user_id] = task
+        task.add_done_callback(self._build_done)
+
+    @staticmethod
+    def _build_done(task: asyncio.Task) -> None:
+        # Also marks the error retrieved when nobody awaits a background rebuild
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Warning: Typeahead index build failed: {task.exception()}")
+
+    async def _install(self, user_id: str) -> UserPrefixIndex:
+        try:
+            index = await self._build(user_id)
+            for operation in self._pending[user_id]:
+                getattr(index, operation[0])(*operation[1:])
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+            return index
+        finally:
+            del self._building[user_id]
+            del self._pending[user_id]
+
+    async def _build(self, user_id: str) -> UserPrefixIndex:
+        db = get_database()
+        items = []
+        for kind, collection in (("note", db.notes), ("task", db.tasks)):
+            async for doc in collection.find({"user_id": user_id}, {"title": 1}):
+                items.append((kind, str(doc["_id"]), doc.get("title") or ""))
+        return UserPrefixIndex.build(items)
+
+
+typeahead_index = TypeaheadIndex(
+    max_users=settings.TYPEAHEAD_MAX_USERS,
+    ttl_seconds=settings.TYPEAHEAD_INDEX_TTL_SECONDS,
+)
@@ -0,0 +1,220 @@
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+import aiofiles
+import aiofiles.os
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from app.core.config import settings
+
+# Room for boundaries and part headers when checking Content-Length
+MULTIPART_OVERHEAD_BYTES = 65536
+
+
+class UploadTooLarge(Exception):
+    """The upload exceeds ``VIDEO_MAX_UPLOAD_BYTES``."""
+
+
+class MalformedUpload(Exception):
+    """The body is not multipart/form-data or lacks the expected file."""
+
+
+class ChunkSizeMismatch(Exception):
+    """A chunk body is longer or shorter than its slot in the file."""
+
+
+@dataclass
+class StoredFile:
+    path: str
+    size: int
+    sha256: str
+
+
+@dataclass
+class MultipartFile:
+    filename: Optional[str]
+    content_type: Optional[str]
+    stored: StoredFile
+
+
+def partial_path(directory: str, filename: str) -> str:
+    """Where ``filename`` is written until it is complete."""
+    return os.path.join(directory, f".{filename}.part")
+
+
+async def save_multipart_upload(
+    content_type: Optional[str],
+    content_length: Optional[str],
+    chunks: AsyncIterator[bytes],
+    field: str,
+    directory: str,
+    name_file: Callable[[Optional[str]], str],
+    max_bytes: int,
+) -> MultipartFile:
+    """
+    Store the file ``field`` of a ``multipart/form-data`` body as it arrives.
+
+    The body is parsed from the request stream and the file's bytes go
+    straight to disk, hashed and measured on the way: nothing is spooled
+    beforehand, so the size limit applies while receiving. Bodies whose
+    ``Content-Length`` already exceeds it are refused before reading.
+    The file is written under a temporary name and renamed once complete,
+    so readers never see partial videos; ``name_file`` gets the client's
+    filename and returns the stored one. Other parts are discarded.
+
+    Raises UploadTooLarge past ``max_bytes`` and MalformedUpload for bodies
+    that are not multipart or lack the file (the partial file is removed).
+    """
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + MULTIPART_OVERHEAD_BYTES:
+        raise UploadTooLarge()
+    mime_type, options = parse_options_header(content_type or "")
+    if mime_type != b"multipart/form-data" or b"boundary" not in options:
+        raise MalformedUpload("Expected a multipart/form-data body")
+
+    part: Dict[str, Any] = {}
+    upload: Dict[str, Any] = {"headers": None, "pieces": [], "done": False}
+    header = {"name": b"", "value": b""}
+
+    def on_part_begin() -> None:
+        part.clear()
+        part["headers"] = {}
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header["name"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header["value"] += data[start:end]
+
+    def on_header_end() -> None:
+        part["headers"][header["name"].lower()] = header["value"]
+        header["name"], header["value"] = b"", b""
+
+    def on_headers_finished() -> None:
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        part["target"] = upload["headers"] is None and disposition.get(b"name") == field.encode()
+        if part["target"]:
+            upload["headers"] = part["headers"]
+            upload["filename"] = disposition.get(b"filename")
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if part.get("target"):
+            upload["pieces"].append(data[start:end])
+
+    def on_part_end() -> None:
+        if part.get("target"):
+            upload["done"] = True
+
+    parser = MultipartParser(options[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    await aiofiles.os.makedirs(directory, exist_ok=True)
+    path = partial = out = None
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async for chunk in chunks:
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise MalformedUpload(f"Invalid multipart body: {e}")
+            if upload["headers"] is not None and out is None:
+                filename = upload["filename"].decode("utf-8", "replace") if upload["filename"] else None
+                path = os.path.join(directory, name_file(filename))
+                partial = partial_path(directory, os.path.basename(path))
+                out = await aiofiles.open(partial, "wb")
+            for piece in upload["pieces"]:
+                size += len(piece)
+                if size > max_bytes:
+                    raise UploadTooLarge()
+                digest.update(piece)
+                await out.write(piece)
+            upload["pieces"].clear()
+        if not upload["done"]:
+            raise MalformedUpload(f"Missing file field '{field}'")
+        await out.close()
+        out = None
+        await aiofiles.os.replace(partial, path)
+    except BaseException:
+        if out is not None:
+            await out.close()
+        if partial and await aiofiles.os.path.exists(partial):
+            await aiofiles.os.remove(partial)
+        raise
+
+    content_type_header = upload["headers"].get(b"content-type")
+    return MultipartFile(
+        filename=filename,
+        content_type=content_type_header.decode("latin-1") if content_type_header else None,
+        stored=StoredFile(path=path, size=size, sha256=digest.hexdigest()),
+    )
+
+
+async def create_partial(directory: str, filename: str, size: int) -> str:
+    """
+    Create the partial file of a resumable upload, ``size`` bytes long.
+
+    The file is sparse: disk space is only used as chunks arrive, and chunks
+    can be written at their offsets in any order.
+    """
+    await aiofiles.os.makedirs(directory, exist_ok=True)
+    partial = partial_path(directory, filename)
+    async with aiofiles.open(partial, "wb") as out:
+        await out.truncate(size)
+    return partial
+
+
+async def write_chunk(partial: str, offset: int, chunks: AsyncIterator[bytes], length: int) -> None:
+    """
+    Write a chunk body at ``offset``, streaming it from ``chunks``.
+
+    Raises ChunkSizeMismatch unless exactly ``length`` bytes arrive; bytes
+    already written stay in place and are overwritten by the retry.
+    """
+    written = 0
+    async with aiofiles.open(partial, "r+b") as out:
+        await out.seek(offset)
+        async for chunk in chunks:
+            written += len(chunk)
+            if written > length:
+                raise ChunkSizeMismatch()
+            await out.write(chunk)
+    if written != length:
+        raise ChunkSizeMismatch()
+
+
+async def finish_partial(directory: str, filename: str) -> StoredFile:
+    """
+    Hash a completed partial file and move it to its final name.
+
+    Safe to repeat: when an earlier call already moved the file, the final
+    file is hashed instead.
+    """
+    partial = partial_path(directory, filename)
+    path = os.path.join(directory, filename)
+    moved = not await aiofiles.os.path.exists(partial) and await aiofiles.os.path.exists(path)
+    digest = hashlib.sha256()
+    size = 0
+    async with aiofiles.open(path if moved else partial, "rb") as source:
+        while True:
+            chunk = await source.read(settings.UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            digest.update(chunk)
+    if not moved:
+        await aiofiles.os.replace(partial, path)
+    return StoredFile(path=path, size=size, sha256=digest.hexdigest())
+
+
+async def remove_partial(directory: str, filename: str) -> None:
+    partial = partial_path(directory, filename)
+    if await aiofiles.os.path.exists(partial):
+        await aiofiles.os.remove(partial)
@@ -0,0 +1,83 @@
+"""
+Compare the default ``response_model`` path with ``json_response`` on pages
+of task documents.
+
+    cd backend && python -m benchmarks.serialization [--rounds 50]
+
+Only serialization is measured: no database, no HTTP.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List
+from bson import ObjectId
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.core.serialization import json_response
+from app.models.task import TaskResponse
+
+
+def make_task(index: int) -> dict:
+    """A Mongo task document with the nested fields filled in."""
+    now = datetime(2024, 1, 1) + timedelta(minutes=index)
+    return {
+        "_id": ObjectId(),
+        "id": str(ObjectId()),
+        "user_id": "507f1f77bcf86cd799439012",
+        "title": f"Task {index}",
+        "description": "Write the quarterly report and review it with the team " * 3,
+        "status": "in_progress",
+        "priority": "high",
+        "due_date": now + timedelta(days=7),
+        "tags": ["work", "report", "q1"],
+        "list_name": "En progreso",
+        "eisenhower_quadrant": "urgent_important",
+        "total_time_spent": 5400,
+        "time_entry_count": 12,
+        "last_time_entry": {"start_time": now, "end_time": now + timedelta(hours=1), "duration_seconds": 3600},
+        "is_running": False,
+        "main_objectives": ["Collect figures", "Draft", "Review"],
+        "resources": [{"name": "Spreadsheet", "url": "https://example.com/sheet"}, {"name": "Previous report"}],
+        "resource_links": ["https://example.com/a", "https://example.com/b"],
+        "subtasks": [
+            {"id": str(i), "title": f"Subtask {i}", "completed": i % 2 == 0, "created_at": now}
+            for i in range(8)
+        ],
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+async def default_path(field, docs: List[dict], response_class) -> bytes:
+    content = await serialize_response(field=field, response_content=docs, is_coroutine=True)
+    return response_class(content).body
+
+
+def measure(run, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        run()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    field = create_response_field(name="response", type_=List[TaskResponse])
+    loop = asyncio.new_event_loop()
+    print(f"{'items':>6} {'JSONResponse':>14} {'ORJSONResponse':>16} {'json_response':>15} {'speedup':>8}")
+    for size in (100, 1000):
+        docs = [make_task(index) for index in range(size)]
+        baseline = measure(lambda: loop.run_until_complete(default_path(field, docs, JSONResponse)), args.rounds)
+        orjson_only = measure(lambda: loop.run_until_complete(default_path(field, docs, ORJSONResponse)), args.rounds)
+        fast = measure(lambda: json_response(List[TaskResponse], docs).body, args.rounds)
+        print(f"{size:>6} {baseline:>12.2f}ms {orjson_only:>14.2f}ms {fast:>13.2f}ms {baseline / fast:>7.1f}x")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
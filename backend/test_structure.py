@@ -87,6 +87,59 @@ def test_jwt_token():
         print(f"❌ JWT token error: {e}")
         return False
 
+def test_admission_keys():
+    """Test admission streaming paths and client keys behind proxies"""
+    print("\nTesting admission control...")
+    
+    try:
+        import ipaddress
+        from app.core import admission
+        from app.core.config import settings
+        
+        prefix = settings.API_V1_PREFIX
+        trusted = admission.TRUSTED_PROXIES
+        for path in ("/notes/upload-video", "/notes/uploads/abc", "/events", "/tasks/export"):
+            if not admission._is_streaming(prefix + path):
+                print(f"❌ {path} should not count as in flight")
+                return False
+        if admission._is_streaming(prefix + "/notes/"):
+            print("❌ /notes/ should count as in flight")
+            return False
+        print("✓ Streaming uploads are exempt from the in-flight limit")
+        
+        def scope(client, forwarded=None):
+            headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+            return {"headers": headers, "client": (client, 1234), "query_string": b""}
+        
+        admission.TRUSTED_PROXIES = []
+        try:
+            direct = admission._client_key(scope("10.0.0.2", "1.2.3.4"))
+        finally:
+            admission.TRUSTED_PROXIES = trusted
+        if direct != "ip:10.0.0.2":
+            print("❌ X-Forwarded-For believed without trusted proxies")
+            return False
+        admission.TRUSTED_PROXIES = [ipaddress.ip_network("10.0.0.0/8")]
+        try:
+            checks = [
+                (scope("10.0.0.2", "6.6.6.6, 1.2.3.4, 10.0.0.3"), "ip:1.2.3.4"),
+                (scope("10.0.0.2"), "ip:10.0.0.2"),
+                (scope("5.5.5.5", "1.2.3.4"), "ip:5.5.5.5"),
+            ]
+            for request_scope, expected in checks:
+                key = admission._client_key(request_scope)
+                if key != expected:
+                    print(f"❌ Client key {key}, expected {expected}")
+                    return False
+        finally:
+            admission.TRUSTED_PROXIES = trusted
+        print("✓ Anonymous clients are keyed on the forwarded address")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Admission control error: {e}")
+        return False
+
 def main():
     """Run all tests"""
     print("=" * 60)
@@ -97,6 +150,7 @@ def main():
         test_imports,
         test_password_hashing,
         test_jwt_token,
+        test_admission_keys,
     ]
     
     results = [test() for test in tests]
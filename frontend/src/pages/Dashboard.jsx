@@ -22,19 +22,20 @@ export default function Dashboard() {
 
   const loadData = async () => {
     try {
-      const [tasksData, notesData] = await Promise.all([
+      const [tasksData, notesData, taskStats] = await Promise.all([
         taskService.getTasks(),
         noteService.getNotes(),
+        taskService.getStats(),
       ]);
       
       setTasks(tasksData);
       setNotes(notesData);
       
-      const completedCount = tasksData.filter(t => t.status === 'done').length;
+      const completedCount = taskStats.by_status.done || 0;
       setStats({
-        totalTasks: tasksData.length,
+        totalTasks: taskStats.total,
         completedTasks: completedCount,
-        pendingTasks: tasksData.length - completedCount,
+        pendingTasks: taskStats.total - completedCount,
         totalNotes: notesData.length,
       });
     } catch (error) {
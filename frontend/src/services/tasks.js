@@ -6,6 +6,11 @@ export const taskService = {
     return response.data;
   },
 
+  async getStats() {
+    const response = await api.get('/api/v1/tasks/stats');
+    return response.data;
+  },
+
   async getTask(id) {
     const response = await api.get(`/api/v1/tasks/${id}`);
     return response.data;